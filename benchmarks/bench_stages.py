@@ -0,0 +1,181 @@
+"""Stage-level benchmarks of the post-processing pipeline on synthetic cases.
+
+Times parsing (full float64 and --compact), resampling, rolling Delta_P, distance grid, spectra, table writing and plot rendering
+separately and reports throughput in input rows/s and peak traced memory. Results
+can be saved as JSON and compared against an earlier run to catch regressions:
+
+    python benchmarks/bench_stages.py --rows 100000 1000000 --json new.json --baseline old.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+
+from thermopost.distance import cumulative_distance, resample_distance
+from thermopost.engine import TIME_START, TIME_STEP
+from thermopost.output import write_table
+from thermopost.reader import read_compact, read_thermotun
+from thermopost.resample import decimate_columns, decimation_factor, interp_columns
+from thermopost.rolling import rolling_delta
+from thermopost.schema import SCHEMAS
+from thermopost.spectrum import DEFAULT_SEGMENT, segment_rows, welch
+from thermopost.synthetic import write_case
+
+
+def _stages(schema, input_path, work_dir):
+    # Each stage is (name, setup, run); setup output is passed to run and its
+    # cost is not measured
+    columns = list(schema.columns)
+    channels = list(schema.resampled)
+    outside = [channels.index(name) for name in schema.outside_pressures]
+    speeds = schema.indices(train.speed for train in schema.trains)
+
+    def parsed():
+        return read_thermotun(input_path, len(columns))
+
+    def grid(data):
+        return np.arange(TIME_START, data[:, 0].max() + TIME_STEP, TIME_STEP)
+
+    def resampled():
+        data = parsed()
+        return interp_columns(grid(data), data[:, 0], data[:, schema.indices(channels)])
+
+    def plot_table():
+        data = parsed()
+        uniform_time = grid(data)
+        values = interp_columns(uniform_time, data[:, 0], data[:, schema.indices(channels)])
+        delta = rolling_delta(values[:, outside], int(round(4.0 / TIME_STEP)))[2]
+        distance = interp_columns(uniform_time, data[:, 0], cumulative_distance(data[:, 0], data[:, speeds]))
+        table = {'Time(s)': uniform_time}
+        table.update(zip((t.distance for t in schema.trains), distance.T))
+        table.update(zip(channels, values.T))
+        table.update(zip((f'Delta_{name}' for name in schema.delta_names), delta.T))
+        return table
+
+    def plot(table):
+        from thermopost.plot import plot_results
+        import matplotlib.pyplot as plt
+        with _quiet():
+            plot_results(schema, table, 4.0, os.path.join(work_dir, 'bench.png'))
+        plt.close('all')
+
+    def write(output_format):
+        def run(data):
+            with _quiet():
+                write_table(columns, data, os.path.join(work_dir, 'bench.csv'), (output_format,))
+        return run
+
+    return [
+        ('parse', lambda: None, lambda _: parsed()),
+        ('parse_compact', lambda: None, lambda _: read_compact(input_path, len(columns), schema.indices(channels))),
+        ('interpolate', parsed, lambda data: interp_columns(grid(data), data[:, 0], data[:, schema.indices(channels)])),
+        ('decimate', parsed, lambda data: decimate_columns(grid(data), data[:, 0], data[:, schema.indices(channels)],
+                                                           decimation_factor(data[:, 0], TIME_STEP))),
+        ('rolling', resampled, lambda values: rolling_delta(values[:, outside], int(round(4.0 / TIME_STEP)))),
+        ('distance', parsed, lambda data: resample_distance(cumulative_distance(data[:, 0], data[:, speeds[:1]])[:, 0],
+                                                             data[:, schema.indices(channels)], 1.0)),
+        ('spectrum', resampled, lambda values: welch(values, segment_rows(DEFAULT_SEGMENT))),
+        ('write_csv', parsed, write('csv')),
+        ('write_npz', parsed, write('npz')),
+        ('plot', plot_table, plot),
+    ]
+
+
+def _quiet():
+    # Silence the "saved to" messages while timing
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _measure(setup, run, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        best = min(best, time.perf_counter() - start)
+
+    # Peak memory in a separate run, tracing slows the timed code down
+    arg = setup()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(modes, row_counts, data_dir, repeat=3, stages=None):
+    results = []
+    os.makedirs(data_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for mode in modes:
+            schema = SCHEMAS[mode]
+            for n_rows in row_counts:
+                input_path = os.path.join(data_dir, f"synthetic-mode{mode}-{n_rows}.txt")
+                if not os.path.exists(input_path):
+                    write_case(input_path, mode, n_rows)
+                for name, setup, run in _stages(schema, input_path, work_dir):
+                    if stages and name not in stages:
+                        continue
+                    seconds, peak = _measure(setup, run, repeat)
+                    result = dict(mode=mode, rows=n_rows, stage=name, seconds=seconds,
+                                  rows_per_second=n_rows / seconds, peak_bytes=peak)
+                    results.append(result)
+                    print(f"mode {mode}  {n_rows:>10} rows  {name:<12} {seconds:9.4f} s"
+                          f"  {n_rows / seconds:14,.0f} rows/s  {peak / 1024 ** 2:9.1f} MB peak")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the results whose throughput dropped more than `tolerance` below the baseline."""
+    reference = {(r['mode'], r['rows'], r['stage']): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = reference.get((result['mode'], result['rows'], result['stage']))
+        if old and result['rows_per_second'] < old['rows_per_second'] * (1 - tolerance):
+            regressions.append((result, old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the post-processing stages on synthetic ThermoTun files.")
+    parser.add_argument('-m', '--modes', type=int, nargs='+', choices=sorted(SCHEMAS), default=sorted(SCHEMAS), help="Modes to benchmark (default: all)")
+    parser.add_argument('-n', '--rows', type=int, nargs='+', default=[10_000, 100_000], help="Row counts of the synthetic files (default: 10000 100000)")
+    parser.add_argument('-s', '--stages', nargs='+', help="Only run these stages")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Timed repetitions per stage, the best is kept (default: 3)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'thermopost-bench'), help="Where synthetic files are generated and reused")
+    parser.add_argument('--json', help="Save the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed throughput drop against the baseline (default: 0.2)")
+
+    args = parser.parse_args()
+    results = run_benchmarks(args.modes, args.rows, args.data_dir, args.repeat, args.stages)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for result, old in regressions:
+            print(f"REGRESSION mode {result['mode']} {result['rows']} rows {result['stage']}: "
+                  f"{result['rows_per_second']:,.0f} rows/s vs {old['rows_per_second']:,.0f} rows/s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
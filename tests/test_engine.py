@@ -0,0 +1,46 @@
+"""Smoke tests of process_file with the optional stages switched on."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from thermopost.batch import output_paths
+from thermopost.comfort import windows_path
+from thermopost.distance import distance_path
+from thermopost.engine import TimeGrid, process_file
+from thermopost.schema import SCHEMAS
+from thermopost.spectrum import spectrum_path
+from thermopost.synthetic import write_case
+
+
+@pytest.mark.parametrize('grid', [TimeGrid(), TimeGrid(0.2, anti_alias=True), TimeGrid(adaptive=0.2)])
+@pytest.mark.parametrize('bounds', [(None, None), (20.0, 40.0)])
+def test_optional_stages(tmp_path, grid, bounds):
+    input_path = str(tmp_path / 'case.txt')
+    write_case(input_path, 2, 1000, seed=2, time_step=0.05)
+    raw_path, interpolated_path = str(tmp_path / 'case_raw.csv'), str(tmp_path / 'case_interpolated.csv')
+    process_file(input_path, raw_path, interpolated_path, plot=False, windows=(1.0, 4.0), spectrum=6.4,
+                 distance_step=1.0, t_start=bounds[0], t_end=bounds[1], grid=grid)
+
+    interpolated = pd.read_csv(interpolated_path)
+    assert len(interpolated) and interpolated['Time(s)'].is_monotonic_increasing
+    by_distance = pd.read_csv(distance_path(interpolated_path))
+    assert len(by_distance) and by_distance.iloc[:, 0].diff().dropna().round(9).eq(1.0).all()
+    assert len(pd.read_csv(windows_path(interpolated_path)))
+    assert len(pd.read_csv(spectrum_path(interpolated_path)))
+    assert os.path.exists(raw_path)
+
+
+def test_compact_keeps_full_raw_table(tmp_path):
+    # A cached full run must not take the narrower compact _raw table for its own
+    input_path = str(tmp_path / 'case.txt')
+    write_case(input_path, 2, 1000, seed=2)
+    for compact in (False, True, False):
+        raw_path, interpolated_path, _ = output_paths(input_path, compact=compact)
+        process_file(input_path, raw_path, interpolated_path, plot=False, compact=compact,
+                     cache_dir=str(tmp_path / 'cache'))
+    full = pd.read_csv(output_paths(input_path)[0])
+    compact = pd.read_csv(output_paths(input_path, compact=True)[0])
+    assert full.shape[1] == len(SCHEMAS[2].columns) + len(SCHEMAS[2].trains)
+    assert compact.shape[1] < full.shape[1]
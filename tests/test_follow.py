@@ -0,0 +1,54 @@
+"""A file followed while it is written gives the same tables as analyzing it once."""
+
+import numpy as np
+import pytest
+
+from thermopost.api import analyze
+from thermopost.follow import CaseFollower
+from thermopost.synthetic import write_case
+
+
+def follow_in_pieces(source, live, rng, max_piece, read_bytes):
+    data = source.read_bytes()
+    live.write_bytes(b"")
+    follower = CaseFollower(str(live), read_bytes=read_bytes)
+    heads = []
+    position = 0
+    with open(live, 'ab') as file:
+        while position < len(data):
+            # Pieces cut lines, the header and the footer anywhere
+            piece = int(rng.integers(1, max_piece))
+            file.write(data[position:position + piece])
+            file.flush()
+            position += piece
+            while follower.poll():
+                pass
+            if follower.schema is not None and follower.resampled.size:
+                heads.append(follower.interpolated_table()[1])
+    follower.finish()
+    assert follower.finished
+    return follower, heads
+
+
+@pytest.mark.parametrize('mode', [1, 2, 3])
+def test_matches_analyze(tmp_path, mode):
+    source = tmp_path / 'source.txt'
+    write_case(str(source), mode, 3000, seed=mode)
+    rng = np.random.default_rng(mode)
+    follower, heads = follow_in_pieces(source, tmp_path / 'live.txt', rng, max_piece=3000, read_bytes=4096)
+    result = analyze(str(source))
+
+    expected_columns, expected = result.interpolated_table()
+    columns, table = follower.interpolated_table()
+    assert columns == expected_columns
+    assert np.array_equal(table, expected)
+    raw_columns, raw = follower.raw_table()
+    assert raw_columns == result.raw_table()[0]
+    assert np.array_equal(raw, result.raw_table()[1])
+
+    # Polls inside the first comfort window, where the back-filled head is redone
+    window = follower.window_size
+    assert sum(len(head) <= window for head in heads) > 1
+    # Rows after the first window are final as soon as they are resampled
+    for head in heads:
+        assert np.array_equal(head[window:], table[window:len(head)])
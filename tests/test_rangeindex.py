@@ -0,0 +1,44 @@
+"""Range min/max index against the rolling scans and brute-force interval min/max."""
+
+import numpy as np
+import pytest
+
+from thermopost.comfort import delta_between
+from thermopost.rangeindex import RangeMinMax
+from thermopost.rolling import rolling_delta
+
+N_ROWS = 300
+
+
+@pytest.fixture
+def values():
+    return np.cumsum(np.random.default_rng(3).normal(size=(N_ROWS, 3)), axis=0)
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 5, 8, 40, 129, N_ROWS - 1, N_ROWS, N_ROWS + 1, 2 * N_ROWS])
+def test_rolling_matches_rolling_delta(values, window):
+    for result, expected in zip(RangeMinMax(values).rolling(window), rolling_delta(values, window)):
+        assert np.array_equal(result, expected)
+
+
+def test_query_matches_brute_force(values):
+    rng = np.random.default_rng(4)
+    start = rng.integers(0, N_ROWS, 500)
+    stop = start + 1 + rng.integers(0, N_ROWS - start)
+    range_min, range_max = RangeMinMax(values).query(start, stop)
+    for i in range(len(start)):
+        assert np.array_equal(range_min[i], values[start[i]:stop[i]].min(axis=0))
+        assert np.array_equal(range_max[i], values[start[i]:stop[i]].max(axis=0))
+
+
+def test_delta_between_matches_brute_force(values):
+    index = RangeMinMax(values)
+    time = np.arange(N_ROWS) * 0.1
+    # A distance axis that stands still for a while, like a stopped train
+    distance = np.concatenate([np.arange(100) * 2.0, np.full(50, 200.0), 200.0 + np.arange(150) * 1.5])
+    for axis in (time, distance):
+        for start, end in [(axis[0], axis[-1]), (axis[10], axis[10]), (axis[5] + 0.01, axis[250] - 0.01),
+                           (axis[99], axis[160]), (axis[100], axis[120]), (-5.0, axis[7]), (axis[290], axis[-1] + 5.0)]:
+            rows = (axis >= start) & (axis <= end)
+            expected = values[rows].max(axis=0) - values[rows].min(axis=0)
+            assert np.array_equal(delta_between(index, axis, start, end), expected)
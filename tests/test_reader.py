@@ -0,0 +1,47 @@
+"""Parity of the streaming reader with the line-by-line parsing of the original mode scripts."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thermopost.reader import HEADER_LINES, parse_thermotun, read_thermotun
+from thermopost.schema import SCHEMAS
+from thermopost.synthetic import write_case
+
+
+def reference_rows(text, n_columns):
+    # The parsing of the original thermopost-mode-*.py scripts
+    data = []
+    for line in text.splitlines()[HEADER_LINES:]:
+        if "Max.value" in line:
+            break
+        data.append(line.strip().split())
+    df = pd.DataFrame(data, columns=range(n_columns))
+    for column in df.columns:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df.dropna().to_numpy(dtype=np.float64)
+
+
+@pytest.mark.parametrize('mode', sorted(SCHEMAS))
+def test_matches_original_parsing(tmp_path, mode):
+    path = tmp_path / f'case{mode}.txt'
+    write_case(str(path), mode, 5000, seed=mode)
+    n_columns = len(SCHEMAS[mode].columns)
+    lines = path.read_text().splitlines(keepends=True)
+    # Blank, short and non-numeric rows, dropped by both
+    lines[HEADER_LINES + 10:HEADER_LINES + 10] = ["\n", "1.0 2.0\n", " ".join(["x"] * n_columns) + "\n"]
+    path.write_text("".join(lines))
+
+    expected = reference_rows(path.read_text(), n_columns)
+    assert np.array_equal(read_thermotun(str(path), n_columns), expected)
+    # Small chunks put those rows and the footer on chunk boundaries
+    assert np.array_equal(parse_thermotun(path.read_bytes(), n_columns, chunk_bytes=4096), expected)
+
+
+def test_long_row_raises():
+    # A short and a long row add up to whole rows, which must not shift the columns
+    text = "header\n" * HEADER_LINES + "0.0 1.0 2.0\n0.1 1.1\n0.2 1.2 2.2 3.2\n0.3 1.3 2.3\n"
+    with pytest.raises(ValueError):
+        reference_rows(text, 3)
+    with pytest.raises(ValueError, match="4 values, expected 3"):
+        parse_thermotun(text.encode(), 3)
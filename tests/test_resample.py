@@ -0,0 +1,74 @@
+"""Resampling kernels against their numpy references."""
+
+import numpy as np
+import pytest
+
+from thermopost.resample import adaptive_rows, decimate_columns, interp_columns
+
+
+def reference_interp(x, xp, fp):
+    return np.column_stack([np.interp(x, xp, column) for column in fp.T])
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_interp_columns_matches_np_interp(dtype):
+    rng = np.random.default_rng(1)
+    xp = np.sort(rng.uniform(0.0, 10.0, 200))
+    xp[50:53] = xp[50]  # duplicate times
+    xp[120:122] = xp[120]
+    fp = rng.normal(size=(200, 4)).astype(dtype)
+    fp[10, 0], fp[11, 0] = np.inf, np.inf
+    fp[30, 1], fp[90, 2] = -np.inf, np.inf
+    fp[51, 3] = np.inf
+    # Out of range, exact hits on xp (duplicates included) and points between
+    x = np.concatenate([[-1.0, xp[0]], rng.uniform(-0.5, 10.5, 1000), xp[[10, 11, 50, 51, 120, -1]], [11.0]])
+    expected = reference_interp(x, xp, fp.astype(np.float64))
+    assert np.array_equal(interp_columns(x, xp, fp), expected, equal_nan=True)
+    assert np.array_equal(interp_columns(x, xp, fp[:, 0]), expected[:, 0], equal_nan=True)
+
+
+def test_interp_columns_single_point():
+    fp = np.array([[1.5, -2.0]])
+    assert np.array_equal(interp_columns([-1.0, 0.0, 3.0], [0.0], fp), reference_interp([-1.0, 0.0, 3.0], [0.0], fp))
+
+
+def test_decimate_columns_gain():
+    xp = np.arange(0.0, 100.0, 0.01)
+    x = np.arange(0.0, 100.0, 0.1)
+    factor = 10
+    # Unit DC gain, also at the held ends
+    assert np.allclose(decimate_columns(x, xp, np.full((len(xp), 2), 3.0), factor), 3.0)
+    # A 0.5 Hz tone passes, a 9 Hz tone, above the 5 Hz Nyquist of x, is filtered out
+    low, high = np.sin(2 * np.pi * 0.5 * xp), np.sin(2 * np.pi * 9.0 * xp)
+    out = decimate_columns(x, xp, np.column_stack([low, high]), factor)
+    inner = slice(20, -20)
+    assert np.abs(out[inner, 0] - np.sin(2 * np.pi * 0.5 * x)[inner]).max() < 0.01
+    assert np.abs(out[inner, 1]).max() < 0.01
+    assert np.abs(interp_columns(x, xp, high)[inner]).max() > 0.5
+
+
+def interpolation_error(values, rows):
+    kept = np.column_stack([np.interp(np.arange(len(values)), rows, column) for column in values[rows].T])
+    return np.abs(kept - values).max()
+
+
+@pytest.mark.parametrize('tolerance', [0.0, 0.05, 0.2, 1.0])
+def test_adaptive_rows_within_tolerance(tolerance):
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(size=(400, 3)), axis=0) * 0.1
+    values[123] += 2.0
+    rows = adaptive_rows(values, 10, tolerance)
+    assert np.array_equal(rows, np.unique(rows))
+    assert set(range(0, 400, 10)) | {399} <= set(rows)
+    assert interpolation_error(values, rows) <= tolerance + 1e-12
+
+
+def test_adaptive_rows_rechecks_dropped_rows():
+    # The row kept for the peak at 5 leaves row 4 further from the new segment
+    values = np.array([0.0, 0.0, 0.0, 0.0, 0.75, 1.0, 0.3, 0.0, 0.0, 0.0, 0.0])[:, np.newaxis]
+    assert interpolation_error(values, adaptive_rows(values, 10, 0.2)) <= 0.2
+
+
+def test_adaptive_rows_negative_tolerance():
+    with pytest.raises(ValueError, match="must not be negative"):
+        adaptive_rows(np.zeros((20, 1)), 10, -0.1)
@@ -0,0 +1,34 @@
+"""Parity of the rolling min/max scans with the pandas code of the original mode scripts."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thermopost.rolling import rolling_delta
+
+N_ROWS = 50
+
+
+def reference_rolling(values, window):
+    # The rolling min/max of the original thermopost-mode-*.py scripts
+    frame = pd.DataFrame(values)
+    rolling_min = frame.rolling(window=window, min_periods=1).min()
+    rolling_max = frame.rolling(window=window, min_periods=1).max()
+    if len(frame) > window:
+        rolling_min.loc[:window - 1] = rolling_min.iloc[window - 1].to_numpy()
+        rolling_max.loc[:window - 1] = rolling_max.iloc[window - 1].to_numpy()
+    return rolling_min.to_numpy(), rolling_max.to_numpy(), (rolling_max - rolling_min).abs().to_numpy()
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 7, 16, N_ROWS - 1, N_ROWS, N_ROWS + 1, 4 * N_ROWS])
+def test_matches_pandas(window):
+    values = np.random.default_rng(window).normal(size=(N_ROWS, 3))
+    for result, expected in zip(rolling_delta(values, window), reference_rolling(values, window)):
+        assert np.array_equal(result, expected)
+
+
+def test_single_column_and_empty():
+    values = np.random.default_rng(0).normal(size=N_ROWS)
+    for result, expected in zip(rolling_delta(values, 5), reference_rolling(values[:, np.newaxis], 5)):
+        assert np.array_equal(result, expected)
+    assert all(result.shape == (0, 1) for result in rolling_delta(np.empty((0, 1)), 5))
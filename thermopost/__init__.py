@@ -0,0 +1,26 @@
+"""Shared post-processing code for the thermopost-mode-* scripts."""
+
+from thermopost.api import CaseResult, analyze
+from thermopost.cache import cached, file_digest
+from thermopost.engine import process_file
+from thermopost.rangeindex import RangeMinMax
+from thermopost.reader import parse_thermotun, read_thermotun
+from thermopost.resample import interp_columns
+from thermopost.rolling import rolling_delta
+from thermopost.schema import SCHEMAS, detect_schema, multi_train_schema
+
+__all__ = [
+    "CaseResult",
+    "RangeMinMax",
+    "SCHEMAS",
+    "analyze",
+    "cached",
+    "detect_schema",
+    "file_digest",
+    "interp_columns",
+    "multi_train_schema",
+    "parse_thermotun",
+    "process_file",
+    "read_thermotun",
+    "rolling_delta",
+]
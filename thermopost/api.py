@@ -0,0 +1,113 @@
+"""In-memory post-processing for notebooks and optimization loops.
+
+    case = analyze("Casexyz1-V01.txt", window=4.0)
+    case.delta.max(axis=0)                  # max Delta_P per outside coach pressure
+    frame = case.interpolated_frame()       # pandas DataFrame
+    case.write("Casexyz1-V01_raw.csv", "Casexyz1-V01_interpolated.csv")
+    case.plot("Casexyz1-V01.png")
+
+Nothing is written or plotted unless asked for.
+"""
+
+import io
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from thermopost.cache import DEFAULT_MAX_BYTES
+from thermopost.engine import (delta_p, interleave_rolling, interpolated_columns, parse_case, resample_case,
+                               train_distances)
+from thermopost.output import write_table
+from thermopost.reader import parse_thermotun
+from thermopost.schema import SCHEMAS, detect_schema_in, resolve_schema
+
+
+@dataclass
+class CaseResult:
+    """Parsed, resampled and rolling Delta_P arrays of one case."""
+    schema: object
+    window: float
+    # Parsed rows, columns follow schema.columns
+    data: np.ndarray
+    uniform_time: np.ndarray
+    # One column per train
+    distance: np.ndarray
+    channels: list
+    # Resampled `channels` on uniform_time
+    resampled: np.ndarray
+    # Columns follow schema.delta_names
+    rolling_min: np.ndarray
+    rolling_max: np.ndarray
+    delta: np.ndarray
+
+    def raw_table(self):
+        """Columns and rows of the _raw table: the parsed rows and a Distance column per train."""
+        columns = list(self.schema.columns) + [train.distance for train in self.schema.trains]
+        return columns, np.hstack([self.data, train_distances(self.schema, self.data[:, 0], self.data, columns)])
+
+    def interpolated_table(self):
+        """Columns and rows of the _interpolated table."""
+        rolling = interleave_rolling(self.rolling_min, self.rolling_max, self.delta)
+        return (interpolated_columns(self.schema, self.channels),
+                np.column_stack([self.uniform_time, self.distance, self.resampled, rolling]))
+
+    def raw_frame(self):
+        import pandas as pd
+        columns, values = self.raw_table()
+        return pd.DataFrame(values, columns=columns, copy=False)
+
+    def interpolated_frame(self):
+        import pandas as pd
+        columns, values = self.interpolated_table()
+        return pd.DataFrame(values, columns=columns, copy=False)
+
+    def write(self, output_csv_path, interpolated_csv_path, output_formats=('csv',)):
+        """Write the _raw and _interpolated tables, return the written paths."""
+        paths = write_table(*self.raw_table(), output_csv_path, output_formats)
+        return paths + write_table(*self.interpolated_table(), interpolated_csv_path, output_formats)
+
+    def plot(self, plot_path=None):
+        """Draw the result figure, saved to `plot_path` or shown in a window."""
+        from thermopost.plot import plot_results
+        columns, values = self.interpolated_table()
+        plot_results(self.schema, dict(zip(columns, values.T)), self.window, plot_path)
+
+
+def _read_source(source):
+    # Bytes of an open file (binary or text) or of a bytes-like buffer
+    if hasattr(source, 'read'):
+        source = source.read()
+    if isinstance(source, str):
+        return source.encode()
+    # np.fromstring needs read-only bytes
+    return source if isinstance(source, bytes) else bytes(source)
+
+
+def analyze(source, mode=None, window=4.0, all_channels=False, cache_dir=None, cache_size=DEFAULT_MAX_BYTES):
+    """Parse, resample and compute rolling Delta_P of a case in memory.
+
+    `source` is a path, an open file (binary or text) or a bytes-like
+    buffer holding ThermoTun output; the mode is detected when not given.
+    The cache is only used for paths. Returns a CaseResult, nothing is
+    written or plotted.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        input_path = os.fspath(source)
+        schema = resolve_schema(input_path, mode)
+        data, digest, _ = parse_case(input_path, schema, cache_dir, cache_size)
+    else:
+        buffer = _read_source(source)
+        schema = detect_schema_in(io.BytesIO(buffer)) if mode is None or mode == 2 else SCHEMAS[mode]
+        if mode and schema.mode != mode:
+            raise ValueError(f"input has the columns of mode {schema.mode}, not mode {mode}")
+        data = parse_thermotun(buffer, len(schema.columns))
+        digest, cache_dir = None, None
+
+    columns = list(schema.columns)
+    channels = columns[1:] if all_channels else list(schema.resampled)
+    uniform_time, distance, resampled, _ = resample_case(schema, data[:, 0], data, columns, channels,
+                                                         digest, cache_dir, cache_size)
+    rolling_min, rolling_max, delta = delta_p(schema, channels, resampled, window)
+    return CaseResult(schema, window, data, uniform_time, distance, channels, resampled,
+                      rolling_min, rolling_max, delta)
@@ -0,0 +1,121 @@
+"""Run a mode's process_file over many case files on a process pool."""
+
+import collections
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from thermopost.profiling import reset_peak_rss
+
+
+def output_paths(input_path, t_start=None, t_end=None, compact=False):
+    # Generate the output paths next to the input file, a time window gets
+    # its own, e.g. <case>_t40-41_raw.csv, so it never replaces the full run.
+    # So does the narrower _raw table of a compact run, <case>_compact_raw.csv
+    base, _ = os.path.splitext(input_path)
+    if t_start is not None or t_end is not None:
+        base += f"_t{'' if t_start is None else f'{t_start:g}'}-{'' if t_end is None else f'{t_end:g}'}"
+    raw = f"{base}_compact_raw.csv" if compact else f"{base}_raw.csv"
+    return raw, f"{base}_interpolated.csv", f"{base}.png"
+
+
+def expand_inputs(patterns):
+    """Expand files, directories (their *.txt files) and glob patterns."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.txt")))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def _init_worker():
+    # Workers never open a window, figures are rendered to files. Only switch
+    # the backend if matplotlib is loaded, so --no-plot workers never import it.
+    if "matplotlib" in sys.modules:
+        sys.modules["matplotlib"].use("Agg")
+    else:
+        os.environ["MPLBACKEND"] = "Agg"
+
+
+def _run_one(process_file, input_path, options):
+    start = time.perf_counter()
+    try:
+        output_csv_path, interpolated_csv_path, plot_path = output_paths(
+            input_path, options.get('t_start'), options.get('t_end'), options.get('compact'))
+        result = process_file(input_path, output_csv_path, interpolated_csv_path, plot_path=plot_path, **options)
+    except Exception as exc:
+        return dict(input=input_path, seconds=time.perf_counter() - start,
+                    error=f"{type(exc).__name__}: {exc}", result=None)
+    return dict(input=input_path, seconds=time.perf_counter() - start, error=None, result=result)
+
+
+def _run_pipelined(process_file, paths, options, depth):
+    # One worker's share of the batch: each case is computed while the outputs
+    # of the previous ones are written and plotted in background processes
+    from thermopost.pipeline import OutputPipeline
+    pipeline = OutputPipeline(depth)
+    try:
+        records = [_run_one(process_file, path, dict(options, pipeline=pipeline)) for path in paths]
+    finally:
+        errors = pipeline.close()
+    for record in records:
+        if record['error'] is None and record['input'] in errors:
+            record['error'] = errors[record['input']]
+    return records, pipeline.stats()
+
+
+def run_batch(process_file, patterns, jobs=None, pipeline_depth=0, **options):
+    """Process every input on a pool of `jobs` workers and report each result.
+
+    `process_file` is any function with the engine.process_file signature,
+    extra keyword options are passed on to it. With a `pipeline_depth`, the
+    inputs are split among the workers and each worker overlaps its writes
+    and plots with the next case, at most `pipeline_depth` cases behind.
+    Returns one dict per file with 'input', 'seconds', 'error' (None on
+    success) and the function's 'result'.
+    """
+    paths = expand_inputs(patterns)
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    records = []
+    background = collections.Counter()
+
+    pool_options = {}
+    if options.get('memory_budget') and not pipeline_depth and not reset_peak_rss():
+        # Without a resettable peak RSS (macOS, Windows) one large case would
+        # fail every later case of its worker, so each case gets a fresh one
+        pool_options['max_tasks_per_child'] = 1
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, **pool_options) as pool:
+        if pipeline_depth:
+            shards = [paths[i::jobs] for i in range(min(jobs, len(paths)))]
+            futures = [pool.submit(_run_pipelined, process_file, shard, options, pipeline_depth) for shard in shards]
+        else:
+            futures = [pool.submit(_run_one, process_file, path, options) for path in paths]
+        for future in as_completed(futures):
+            if pipeline_depth:
+                done, stats = future.result()
+                background.update(stats)
+            else:
+                done = [future.result()]
+            for record in done:
+                records.append(record)
+                if record['error'] is None:
+                    print(f"[ok]     {record['input']} ({record['seconds']:.2f} s)")
+                else:
+                    print(f"[failed] {record['input']} ({record['seconds']:.2f} s): {record['error']}")
+
+    elapsed = time.perf_counter() - start
+    failed = sum(record['error'] is not None for record in records)
+    print(f"Processed {len(paths)} files ({failed} failed) in {elapsed:.2f} s on {jobs} workers, "
+          f"{len(paths) / elapsed:.2f} files/s")
+    if pipeline_depth:
+        print(f"Pipeline: {background['write_seconds']:.2f} s of writes and {background['plot_seconds']:.2f} s "
+              f"of plots ran in the background, {background['blocked_seconds']:.2f} s waited on full queues")
+    return records
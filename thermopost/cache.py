@@ -0,0 +1,75 @@
+"""On-disk cache of parsed and resampled arrays keyed by input content."""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def file_digest(input_path):
+    # Hash of the file contents, so renamed or touched files still hit the cache
+    digest = hashlib.blake2b(digest_size=20)
+    with open(input_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_path(cache_dir, key):
+    name = hashlib.blake2b(repr(key).encode(), digest_size=20).hexdigest()
+    return os.path.join(cache_dir, f"{name}.npy")
+
+
+def _evict(cache_dir, max_bytes):
+    # Least recently used entries go first, a hit refreshes the entry's mtime
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npy"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def cached(cache_dir, key, compute, max_bytes=DEFAULT_MAX_BYTES):
+    """Return compute() through the cache, or straight away if cache_dir is None.
+
+    `key` is any repr-able tuple naming the input digest and every parameter
+    the array depends on. Also returns whether the array came from the cache.
+    """
+    if cache_dir is None:
+        return compute(), False
+
+    path = _entry_path(cache_dir, key)
+    try:
+        array = np.load(path, allow_pickle=False)
+        os.utime(path)
+        return array, True
+    except (OSError, ValueError):
+        pass
+
+    array = compute()
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            np.save(file, array, allow_pickle=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _evict(cache_dir, max_bytes)
+    return array, False
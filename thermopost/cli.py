@@ -0,0 +1,133 @@
+"""Command line shared by the thermopost-mode-* scripts and python -m thermopost."""
+
+import argparse
+import os
+import sys
+
+from thermopost.batch import output_paths, run_batch
+from thermopost.cache import DEFAULT_MAX_BYTES
+from thermopost.comfort import DEFAULT_WINDOWS
+from thermopost.engine import ADAPTIVE_REFINE, TIME_STEP, TimeGrid, plot_file, process_file
+from thermopost.follow import follow_file
+from thermopost.output import OUTPUT_FORMATS, PLOT_FORMATS
+from thermopost.pipeline import DEFAULT_DEPTH
+from thermopost.profiling import aggregate, write_json
+from thermopost.schema import SCHEMAS
+from thermopost.spectrum import DEFAULT_SEGMENT
+from thermopost.summary import DEFAULT_LIMIT, summarize_file, write_summary
+
+
+def main(mode=None):
+    """Run the CLI; with mode=None the mode is an option, auto-detected by default."""
+    parser = argparse.ArgumentParser(description="Process a data file and generate plots.")
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument('-f', '--file', help="Input filename")
+    inputs.add_argument('-b', '--batch', nargs='+', help="Input files, directories or glob patterns, processed headless on a process pool")
+    if mode is None:
+        parser.add_argument('-m', '--mode', type=int, choices=sorted(SCHEMAS), help="ThermoTun output mode (default: detected per file)")
+    parser.add_argument('-j', '--jobs', type=int, help="Number of worker processes for --batch (default: all cores)")
+    parser.add_argument('--pipeline', type=int, nargs='?', const=DEFAULT_DEPTH, default=0, metavar='DEPTH', help=f"With --batch, write and plot each case in background processes while the next one is computed, at most DEPTH cases behind per worker (default: {DEFAULT_DEPTH})")
+    parser.add_argument('-a', '--all-channels', action='store_true', help="Resample every channel, not only the coach pressures")
+    parser.add_argument('-w', '--window', type=float, default=4.0, help="Comfort window for ΔPout in seconds (default: 4)")
+    grid = parser.add_mutually_exclusive_group()
+    grid.add_argument('--time-step', type=float, metavar='SECONDS', help=f"Spacing of the uniform time grid (default: {TIME_STEP:g})")
+    grid.add_argument('--rate', type=float, metavar='HZ', help="Sample rate of the uniform time grid, instead of --time-step")
+    parser.add_argument('--anti-alias', action='store_true', help="Low-pass filter the channels before resampling onto a grid coarser than the input, so faster content does not alias")
+    parser.add_argument('--adaptive', type=float, metavar='KPA', help=f"Compute on a grid {ADAPTIVE_REFINE}x finer than the step and keep in the _interpolated table only the step rows and the finer rows needed to follow peaks and steep gradients within this tolerance")
+    parser.add_argument('--t-start', type=float, metavar='SECONDS', help="Only process the rows from this time on, parsed through a <case>_rowindex.npz sidecar built once per file")
+    parser.add_argument('--t-end', type=float, metavar='SECONDS', help="Only process the rows up to this time, as --t-start")
+    parser.add_argument('--windows', type=float, nargs='+', metavar='SECONDS', help=f"Also report max ΔPout for each of these comfort windows, e.g. {' '.join(f'{w:g}' for w in DEFAULT_WINDOWS)}, in <case>_windows.csv or as --summary rows")
+    parser.add_argument('--spectrum', type=float, nargs='?', const=DEFAULT_SEGMENT, metavar='SECONDS', help=f"Also write the Welch PSD of every resampled channel (-a: every channel) to <case>_spectrum.csv and plot it, with segments of SECONDS (default: {DEFAULT_SEGMENT:g})")
+    parser.add_argument('--distance-step', type=float, metavar='METRES', help="Also resample the time and every resampled channel onto a uniform grid of the first train's distance with this spacing, into <case>_distance.csv")
+    parser.add_argument('-o', '--output-format', nargs='+', choices=OUTPUT_FORMATS, default=['csv'], help="Formats for the _raw and _interpolated tables (default: csv)")
+    parser.add_argument('--plot-format', nargs='+', choices=PLOT_FORMATS, help="Save the figure as <case>.png/.svg/.pdf with a non-GUI backend instead of opening a window (batches save PNG by default)")
+    stages = parser.add_mutually_exclusive_group()
+    stages.add_argument('--no-plot', action='store_true', help="Compute and write tables only, matplotlib is never imported")
+    stages.add_argument('--plot-only', action='store_true', help="Only plot, from the _interpolated table of an earlier run (first --output-format)")
+    stages.add_argument('--summary', metavar='PATH', help="Write one row of comfort metrics per case, train and coach to this CSV instead of the per-case outputs")
+    parser.add_argument('--store', metavar='PATH', help="Also load each case, its _interpolated table and summary rows into this SQLite results store, queried with python -m thermopost.store")
+    parser.add_argument('--follow', action='store_true', help="Keep post-processing --file while the simulation writes it, until its footer appears or Ctrl+C")
+    parser.add_argument('--interval', type=float, default=10.0, help="Seconds between refreshes of the _interpolated table and plot with --follow (default: 10)")
+    parser.add_argument('--limit', type=float, default=DEFAULT_LIMIT, help=f"ΔPout limit in kPa for --summary (default: {DEFAULT_LIMIT:g})")
+    parser.add_argument('--profile', action='store_true', help="Write per-stage wall/CPU time, peak RSS and row counts to <case>_profile.json; batches also write a summary to --profile-summary")
+    parser.add_argument('--profile-summary', default='batch_profile.json', help="Aggregated batch profile (default: batch_profile.json)")
+    parser.add_argument('--compact', action='store_true', help="Parse only the resampled channels and train speeds, as float32 columns (time stays float64), and print the peak memory")
+    parser.add_argument('--memory-budget', type=float, metavar='MB', help="Fail a case whose peak memory exceeds this many MB")
+    parser.add_argument('--cache-dir', default=os.environ.get('THERMOPOST_CACHE_DIR'), help="Cache parsed and resampled arrays in this directory (default: $THERMOPOST_CACHE_DIR, off if unset)")
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2, help="Cache size limit in MB, least recently used entries are evicted first")
+
+    args = parser.parse_args()
+    if args.follow and (args.batch or args.plot_only or args.summary):
+        parser.error("--follow needs a single --file and no --plot-only or --summary")
+    if args.store and (args.plot_only or args.summary or args.follow):
+        parser.error("--store needs the full processing, no --plot-only, --summary or --follow")
+    windowed = args.t_start is not None or args.t_end is not None
+    if windowed and (args.plot_only or args.summary or args.follow or args.compact):
+        parser.error("--t-start/--t-end need the full processing, no --plot-only, --summary, --follow or --compact")
+    resampling = args.time_step is not None or args.rate is not None or args.anti_alias
+    adaptive = args.adaptive is not None
+    if (resampling or adaptive) and (args.plot_only or args.follow):
+        parser.error("--time-step, --rate, --anti-alias and --adaptive do not apply to --plot-only or --follow")
+    if adaptive and args.summary:
+        parser.error("--adaptive only changes the _interpolated table, not --summary")
+    if args.time_step is not None and args.time_step <= 0 or args.rate is not None and args.rate <= 0:
+        parser.error("--time-step and --rate must be positive")
+    if adaptive and args.adaptive <= 0:
+        parser.error("--adaptive must be positive")
+    if args.pipeline and (not args.batch or args.plot_only or args.summary):
+        parser.error("--pipeline needs --batch and no --plot-only or --summary")
+    options = dict(mode=mode or args.mode, window=args.window, all_channels=args.all_channels,
+                   cache_dir=args.cache_dir, cache_size=int(args.cache_size * 1024 ** 2),
+                   output_formats=tuple(args.output_format), compact=args.compact)
+    if resampling or adaptive:
+        options['grid'] = TimeGrid(1 / args.rate if args.rate else args.time_step or TIME_STEP, args.anti_alias,
+                                   args.adaptive)
+    if args.plot_format:
+        options['plot_formats'] = tuple(args.plot_format)
+    if args.summary:
+        stage = summarize_file
+        options['limit'] = args.limit
+        options['windows'] = tuple(args.windows or ())
+    elif args.plot_only:
+        stage = plot_file
+    elif args.follow:
+        stage = follow_file
+        options['plot'] = not args.no_plot
+        options['interval'] = args.interval
+    else:
+        stage = process_file
+        options['plot'] = not args.no_plot
+        options['profile'] = args.profile
+        options['windows'] = tuple(args.windows or ())
+        options['memory_budget'] = args.memory_budget and int(args.memory_budget * 1024 ** 2)
+        options['store'] = args.store
+        options['t_start'] = args.t_start
+        options['t_end'] = args.t_end
+        options['spectrum'] = args.spectrum
+        options['distance_step'] = args.distance_step
+
+    if args.batch:
+        records = run_batch(stage, args.batch, args.jobs, args.pipeline, **options)
+        if options.get('profile'):
+            reports = [record['result'] for record in records if record['result']]
+            write_json(aggregate(reports), args.profile_summary)
+            print(f"Batch profile saved to {args.profile_summary}")
+        if args.summary:
+            rows = [row for record in records if record['result'] for row in record['result']]
+            rows.sort(key=lambda row: (row['case'], row['train'], row['coach'], row['window_s']))
+            write_summary(rows, args.summary)
+            print(f"Summary of {len(rows)} trains/coaches saved to {args.summary}")
+        failed = any(record['error'] for record in records)
+        sys.exit(1 if failed else 0)
+
+    # Generate output CSV paths
+    output_csv_path, interpolated_csv_path, plot_path = output_paths(args.file, args.t_start, args.t_end, args.compact)
+    if args.follow or args.plot_format:
+        # Render to files; with --follow a window would block the loop
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+        options['plot_path'] = plot_path
+
+    result = stage(args.file, output_csv_path, interpolated_csv_path, **options)
+    if args.summary:
+        write_summary(result, args.summary)
+        print(f"Summary saved to {args.summary}")
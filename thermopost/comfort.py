@@ -0,0 +1,58 @@
+"""Max Delta_P of the outside coach pressures for several comfort windows at once."""
+
+import csv
+import os
+
+import numpy as np
+
+from thermopost.engine import TIME_STEP, outside_pressures, window_rows
+from thermopost.rangeindex import RangeMinMax
+
+DEFAULT_WINDOWS = (1.0, 3.0, 4.0, 10.0)
+
+WINDOW_COLUMNS = ['window_s', 'channel', 'max_delta_p_kPa', 'time_of_max_s']
+
+
+def outside_index(schema, channels, resampled):
+    """Range min/max index over the outside coach pressures, columns follow schema.delta_names."""
+    return RangeMinMax(outside_pressures(schema, channels, resampled))
+
+
+def window_deltas(index, windows, time_step=TIME_STEP):
+    """Yield each window (seconds) with its rolling Delta_P, all from one index."""
+    for window in windows:
+        yield window, index.rolling(window_rows(window, time_step))[2]
+
+
+def delta_between(index, axis, start, end):
+    """Delta_P per channel over the rows whose `axis` value (time or distance) is in [start, end]."""
+    first = np.searchsorted(axis, start, side='left')
+    stop = np.searchsorted(axis, end, side='right')
+    return index.delta(first, stop)
+
+
+def window_maxima(schema, channels, resampled, uniform_time, windows=DEFAULT_WINDOWS, time_step=TIME_STEP):
+    """Return one record per window and outside coach pressure with its max Delta_P."""
+    records = []
+    for window, delta in window_deltas(outside_index(schema, channels, resampled), windows, time_step):
+        peak_rows = delta.argmax(axis=0)
+        for i, name in enumerate(schema.delta_names):
+            records.append({
+                'window_s': window,
+                'channel': name,
+                'max_delta_p_kPa': float(delta[peak_rows[i], i]),
+                'time_of_max_s': float(uniform_time[peak_rows[i]]),
+            })
+    return records
+
+
+def windows_path(interpolated_csv_path):
+    base, _ = os.path.splitext(interpolated_csv_path)
+    return f"{base.removesuffix('_interpolated')}_windows.csv"
+
+
+def write_windows(records, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=WINDOW_COLUMNS)
+        writer.writeheader()
+        writer.writerows(records)
@@ -0,0 +1,131 @@
+"""Compare cases of one mode on a common time or distance grid.
+
+Usage: python -m thermopost.compare Casexyz1-V01.txt Casexyz1-V02.txt Casexyz1-V03.txt --axis distance
+
+The first case is the baseline. Each case goes through the cache, so
+comparing new runs against the same baseline does not reparse it.
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+
+import numpy as np
+
+from thermopost.api import analyze
+from thermopost.cache import DEFAULT_MAX_BYTES
+from thermopost.output import OUTPUT_FORMATS, PLOT_FORMATS, table_paths, write_table
+from thermopost.resample import interp_columns
+from thermopost.schema import SCHEMAS
+from thermopost.summary import case_name
+
+AXES = ('time', 'distance')
+
+DEVIATION_COLUMNS = ['case', 'baseline', 'channel', 'max_abs_diff', 'axis_of_max', 'rms_diff']
+
+
+def compare_files(input_paths, mode=None, axis='time', train=1, window=4.0, all_channels=False,
+                  cache_dir=None, cache_size=DEFAULT_MAX_BYTES):
+    """Resample cases onto one grid, the first case is the baseline.
+
+    The grid is the uniform time grid up to the shortest run, or for
+    `axis='distance'` a grid over the distance range all cases cover for
+    train `train`, spaced as the baseline's. Returns the schema, the
+    grid, the column names (the resampled channels, then the Delta_ columns)
+    and a cases x grid x columns array.
+    """
+    cases = [analyze(path, mode, window, all_channels, cache_dir, cache_size) for path in input_paths]
+    schema = cases[0].schema
+    for path, case in zip(input_paths[1:], cases[1:]):
+        if case.schema != schema:
+            raise ValueError(f"{path} has the columns of mode {case.schema.mode} with {len(case.schema.trains)} "
+                             f"train(s), the baseline mode {schema.mode} with {len(schema.trains)}")
+    columns = cases[0].channels + [f'Delta_{name}' for name in schema.delta_names]
+
+    if axis == 'time':
+        # Every case is on the same uniform grid, only the lengths differ
+        n = min(len(case.uniform_time) for case in cases)
+        grid = cases[0].uniform_time[:n]
+        values = np.stack([np.column_stack([case.resampled[:n], case.delta[:n]]) for case in cases])
+    else:
+        distances = [case.distance[:, train - 1] for case in cases]
+        step = np.median(np.diff(distances[0]))
+        start, end = max(d[0] for d in distances), min(d[-1] for d in distances)
+        grid = start + np.arange(int(np.floor((end - start) / step)) + 1) * step
+        values = np.stack([interp_columns(grid, d, np.column_stack([case.resampled, case.delta]))
+                           for case, d in zip(cases, distances)])
+    return schema, grid, columns, values
+
+
+def deviations(names, columns, grid, values):
+    """Max absolute and RMS difference to the baseline per case and column."""
+    differences = values[1:] - values[0]
+    peak_rows = np.abs(differences).argmax(axis=1)
+    rms = np.sqrt((differences ** 2).mean(axis=1))
+    records = []
+    for i, name in enumerate(names[1:]):
+        for j, column in enumerate(columns):
+            records.append({
+                'case': name,
+                'baseline': names[0],
+                'channel': column,
+                'max_abs_diff': float(abs(differences[i, peak_rows[i, j], j])),
+                'axis_of_max': float(grid[peak_rows[i, j]]),
+                'rms_diff': float(rms[i, j]),
+            })
+    return records
+
+
+def write_deviations(records, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=DEVIATION_COLUMNS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ThermoTun cases of one mode against the first one.")
+    parser.add_argument('inputs', nargs='+', help="Baseline input file, then the cases to compare with it")
+    parser.add_argument('-m', '--mode', type=int, choices=sorted(SCHEMAS), help="ThermoTun output mode (default: detected)")
+    parser.add_argument('--axis', choices=AXES, default='time', help="Common grid over time or train distance (default: time)")
+    parser.add_argument('--train', type=int, default=1, help="Train whose distance and coach pressures are used (default: 1)")
+    parser.add_argument('-a', '--all-channels', action='store_true', help="Compare every channel, not only the coach pressures")
+    parser.add_argument('-w', '--window', type=float, default=4.0, help="Comfort window for ΔPout in seconds (default: 4)")
+    parser.add_argument('--output', help="Base path of the outputs (default: <baseline>_compare)")
+    parser.add_argument('-o', '--output-format', nargs='+', choices=OUTPUT_FORMATS, default=['csv'], help="Formats for the _diff table of difference curves (default: csv)")
+    parser.add_argument('--plot-format', nargs='+', choices=PLOT_FORMATS, help="Save the overlay figure as <output>.png/.svg/.pdf instead of opening a window")
+    parser.add_argument('--no-plot', action='store_true', help="Only write the tables")
+    parser.add_argument('--cache-dir', default=os.environ.get('THERMOPOST_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'thermopost-cache'), help="Cache of parsed and resampled arrays (default: $THERMOPOST_CACHE_DIR or a temp directory)")
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2, help="Cache size limit in MB, least recently used entries are evicted first")
+
+    args = parser.parse_args()
+    if len(args.inputs) < 2:
+        parser.error("need a baseline and at least one case to compare")
+    if args.plot_format:
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+
+    schema, grid, columns, values = compare_files(args.inputs, args.mode, args.axis, args.train, args.window,
+                                                  args.all_channels, args.cache_dir, int(args.cache_size * 1024 ** 2))
+    names = [case_name(path) for path in args.inputs]
+    base = args.output or f"{os.path.splitext(args.inputs[0])[0]}_compare"
+    axis_column = 'Time(s)' if args.axis == 'time' else schema.trains[args.train - 1].distance
+
+    path = f"{base}_deviations.csv"
+    write_deviations(deviations(names, columns, grid, values), path)
+    print(f"Deviations saved to {path}")
+
+    diff_columns = [axis_column] + [f'{name}:{column}' for name in names[1:] for column in columns]
+    differences = (values[1:] - values[0]).transpose(1, 0, 2).reshape(len(grid), -1)
+    for path in write_table(diff_columns, np.column_stack([grid, differences]), f"{base}_diff.csv",
+                            tuple(args.output_format)):
+        print(f"Difference curves saved to {path}")
+
+    if not args.no_plot:
+        from thermopost.plot import plot_comparison
+        plot_comparison(schema, names, axis_column, grid, columns, values, args.train, args.window,
+                        args.plot_format and table_paths(f"{base}.png", args.plot_format))
+
+
+if __name__ == "__main__":
+    main()
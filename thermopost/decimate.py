@@ -0,0 +1,33 @@
+"""Peak-preserving decimation of long series before plotting."""
+
+import numpy as np
+
+# About one bucket per pixel column of a subplot, with margin for large figures
+DEFAULT_BUCKETS = 2000
+
+
+def minmax_decimate(x, y, n_buckets=DEFAULT_BUCKETS):
+    """Keep the first and last point and the min and max of `y` in each bucket.
+
+    The series is split into `n_buckets` buckets of equal point counts, which
+    on the uniform time grid are equal x ranges. The kept points stay in
+    their original order, so every spike is drawn at its true height while
+    the line has at most 2 * n_buckets + 2 points. Short series are returned
+    as they are.
+    """
+    y = np.asarray(y)
+    n_points = len(y)
+    if n_points <= 2 * n_buckets + 2:
+        return x, y
+
+    size = -(-n_points // n_buckets)
+    n_full = n_points // size
+    blocks = y[:n_full * size].reshape(n_full, size)
+    starts = np.arange(n_full) * size
+    keep = [starts + blocks.argmin(axis=1), starts + blocks.argmax(axis=1), [0, n_points - 1]]
+    if n_full * size < n_points:
+        tail = y[n_full * size:]
+        keep.append([n_full * size + tail.argmin(), n_full * size + tail.argmax()])
+
+    keep = np.unique(np.concatenate(keep))
+    return np.asarray(x)[keep], y[keep]
@@ -0,0 +1,43 @@
+"""Train distance integrated from the speed, and resampling onto a uniform distance grid."""
+
+import os
+
+import numpy as np
+
+from thermopost.resample import interp_columns
+
+
+def cumulative_distance(time, speeds, start=0.0):
+    """Distance run at each row, one column per column of `speeds` (rows x trains).
+
+    Cumulative trapezoidal integral of the speed over `time`, starting at
+    `start` (0, or the distance per column already run before the first
+    row), so accelerating and braking trains are placed where they really
+    are.
+    """
+    speeds = np.asarray(speeds, dtype=np.float64)
+    distance = np.zeros(speeds.shape)
+    if len(speeds) > 1:
+        steps = (speeds[1:] + speeds[:-1]) * (0.5 * np.diff(time))[:, np.newaxis]
+        np.cumsum(steps, axis=0, out=distance[1:])
+    distance += start
+    return distance
+
+
+def resample_distance(distance, values, step):
+    """Resample the columns of `values` onto a grid of `distance` spaced `step` m.
+
+    `distance` must not decrease (the train does not reverse). All columns
+    share one bracket search. Returns the grid, from the first multiple of
+    `step` at or after the first distance (0 for a whole run) and going one
+    step past the end like the uniform time grid, and the resampled block.
+    """
+    if np.any(np.diff(distance) < 0):
+        raise ValueError("the train reverses, its distance has no uniform grid")
+    grid = np.arange(np.ceil(distance[0] / step) * step, distance[-1] + step, step)
+    return grid, interp_columns(grid, distance, values)
+
+
+def distance_path(interpolated_csv_path):
+    base, _ = os.path.splitext(interpolated_csv_path)
+    return f"{base.removesuffix('_interpolated')}_distance.csv"
@@ -0,0 +1,383 @@
+"""Schema-driven parse -> resample -> rolling Delta_P -> output pipeline."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from thermopost.cache import DEFAULT_MAX_BYTES, cached, file_digest
+from thermopost.distance import cumulative_distance
+from thermopost.output import is_up_to_date, read_table, table_paths, write_table
+from thermopost.profiling import StageProfiler, profile_path, write_json
+from thermopost.reader import read_compact, read_thermotun
+from thermopost.resample import adaptive_rows, decimate_columns, decimation_factor, interp_columns
+from thermopost.rolling import rolling_delta
+from thermopost.schema import resolve_schema
+
+TIME_START = 0.0
+TIME_STEP = 0.1
+# Adaptive tables are computed on a grid this many times finer than the step
+ADAPTIVE_REFINE = 10
+
+
+@dataclass(frozen=True)
+class TimeGrid:
+    """The uniform time grid the channels are resampled onto, from TIME_START every `step` s.
+
+    With `anti_alias`, a step coarser than the input spacing low-pass filters
+    the channels first, see resample.decimate_columns. With an `adaptive`
+    tolerance (in the channel units), the stages run on a grid
+    ADAPTIVE_REFINE times finer and the _interpolated table keeps only the
+    rows needed to stay within it, see resample.adaptive_rows.
+    """
+    step: float = TIME_STEP
+    anti_alias: bool = False
+    adaptive: float = None
+
+    @property
+    def compute_step(self):
+        # Spacing of the grid the stages run on
+        return self.step if self.adaptive is None else self.step / ADAPTIVE_REFINE
+
+
+DEFAULT_GRID = TimeGrid()
+
+
+def parse_case(input_path, schema, cache_dir=None, cache_size=DEFAULT_MAX_BYTES):
+    """Parse a case, or reuse the block from the cache when the file contents are unchanged.
+
+    Returns the (n_rows, n_columns) block, the content digest (None without a
+    cache) and whether the block came from the cache.
+    """
+    columns = list(schema.columns)
+    digest = file_digest(input_path) if cache_dir else None
+    data, from_cache = cached(cache_dir, (digest, columns), lambda: read_thermotun(input_path, len(columns)), cache_size)
+    return data, digest, from_cache
+
+
+def parse_compact(input_path, schema, channels):
+    """Parse Time(s) as float64 and only `channels` and the train speeds as float32.
+
+    Returns the time, the kept column names and their Fortran-ordered block,
+    with `channels` first so they are resampled from a view. Other columns
+    are dropped chunk by chunk while parsing.
+    """
+    speeds = [train.speed for train in schema.trains if train.speed not in channels]
+    kept = list(channels) + speeds
+    time, data = read_compact(input_path, len(schema.columns), schema.indices(kept))
+    return time, kept, data
+
+
+def select_columns(data, data_columns, names):
+    """The `names` columns of `data`, a view when they are adjacent and in order."""
+    indices = [data_columns.index(name) for name in names]
+    if indices == list(range(indices[0], indices[0] + len(indices))):
+        return data[:, indices[0]:indices[0] + len(indices)]
+    return data[:, indices]
+
+
+def resample_case(schema, time, data, data_columns, channels, digest=None, cache_dir=None,
+                  cache_size=DEFAULT_MAX_BYTES, grid_bounds=None, grid=DEFAULT_GRID, distance_start=0.0):
+    """Resample `channels` onto the uniform time grid with one shared bracket search.
+
+    `data_columns` names the columns of `data`. Returns the grid, each
+    train's distance on it, the resampled block and whether that block came
+    from the cache. `grid_bounds` (start, end) keeps only the grid points
+    within them, as for a time window of a longer run. `grid` is a
+    TimeGrid, resampled at its compute_step. `distance_start` is each train's distance at the first row, see
+    train_distances.
+    """
+    if not len(time):
+        raise ValueError(f"no data rows to resample: the input is empty or its rows do not have the "
+                         f"{len(schema.columns)} values of mode {schema.mode}")
+    time_step = grid.compute_step
+    uniform_time = np.arange(TIME_START, time.max() + time_step, time_step)
+    if grid_bounds is not None:
+        start, end = np.searchsorted(uniform_time, grid_bounds[0]), np.searchsorted(uniform_time, grid_bounds[1], 'right')
+        uniform_time = uniform_time[start:end]
+
+    resampled, from_cache = cached(
+        cache_dir, (digest, list(schema.columns), TIME_START, time_step, channels, grid.anti_alias),
+        lambda: resample_columns(uniform_time, time, select_columns(data, data_columns, channels), grid),
+        cache_size)
+
+    # Each train's integrated distance at the grid points
+    distance = interp_columns(uniform_time, time, train_distances(schema, time, data, data_columns, distance_start))
+    return uniform_time, distance, resampled, from_cache
+
+
+def resample_columns(uniform_time, time, values, grid=DEFAULT_GRID):
+    # Every column of `values` on `uniform_time`, low-pass filtered first with grid.anti_alias
+    if grid.anti_alias:
+        return decimate_columns(uniform_time, time, values, decimation_factor(time, grid.compute_step))
+    return interp_columns(uniform_time, time, values)
+
+
+def train_distances(schema, time, data, data_columns, start=0.0):
+    """Distance run by every train at each row of `data`, one column per train.
+
+    Integrated from the speed columns from `start` at the first row (per
+    train, for a time window), see distance.cumulative_distance.
+    """
+    speeds = [train.speed for train in schema.trains]
+    return cumulative_distance(time, select_columns(data, data_columns, speeds), start)
+
+
+def window_rows(window, time_step=TIME_STEP):
+    # Rows of the uniform grid in a comfort window of `window` seconds
+    return max(int(round(window / time_step)), 1)
+
+
+def train_pressures(schema, channels, values):
+    """The coach pressures of `values` (time x channels) as a trains x 4 x time array.
+
+    The second axis follows Train.coach_pressures. It is a view when the coach
+    pressures are adjacent in `channels`, as in schema.resampled, so any
+    number of trains is handled by the same array operations.
+    """
+    names = [name for train in schema.trains for name in train.coach_pressures]
+    return select_columns(values, channels, names).T.reshape(len(schema.trains), 4, len(values))
+
+
+def outside_pressures(schema, channels, values):
+    """Front and rear outside pressures of every train as time x channel columns.
+
+    Columns follow schema.delta_names.
+    """
+    return train_pressures(schema, channels, values)[:, [0, 2]].reshape(-1, len(values)).T
+
+
+def delta_p(schema, channels, resampled, window, time_step=TIME_STEP):
+    """Rolling min, max and Delta_P over `window` seconds of every outside coach pressure.
+
+    Columns follow schema.delta_names, `resampled` is spaced `time_step` s.
+    """
+    return rolling_delta(outside_pressures(schema, channels, resampled), window_rows(window, time_step))
+
+
+def interpolated_columns(schema, channels):
+    """Column names of the _interpolated table: time, train distances, `channels`
+    and rolling min, max and Delta of every outside coach pressure."""
+    rolling_columns = [f'{prefix}{name}' for name in schema.delta_names
+                       for prefix in ('rolling-min-', 'rolling-max-', 'Delta_')]
+    return ['Time(s)'] + [train.distance for train in schema.trains] + list(channels) + rolling_columns
+
+
+def interleave_rolling(rolling_min, rolling_max, delta):
+    # Interleave min, max and Delta per channel to match interpolated_columns
+    return np.stack([rolling_min, rolling_max, delta], axis=2).reshape(len(delta), -1)
+
+
+def _save_table(label, columns, values, table_path, output_formats):
+    for path in write_table(columns, values, table_path, output_formats):
+        print(f"{label} saved to {path}")
+
+
+def _save_windows(records, path):
+    from thermopost.comfort import write_windows
+    write_windows(records, path)
+    print(f"Window maxima saved to {path}")
+
+
+def process_file(input_path, output_csv_path, interpolated_csv_path, mode=None, window=4.0,
+                 all_channels=False, cache_dir=None, cache_size=DEFAULT_MAX_BYTES,
+                 output_formats=('csv',), plot=True, plot_path=None, profile=False, windows=(),
+                 compact=False, memory_budget=None, plot_formats=('png',), pipeline=None,
+                 store=None, t_start=None, t_end=None, spectrum=None, distance_step=None,
+                 grid=DEFAULT_GRID):
+    """Post-process one ThermoTun file, the mode is detected when not given.
+
+    Parsing: `compact` parses only the resampled channels and train speeds
+    into float32 columns (time stays float64), bypassing the cache.
+    `t_start`/`t_end` (seconds) parse only the rows of that time window,
+    found through the rowindex sidecar of the input, also bypassing the
+    cache. `grid` is the TimeGrid the channels are resampled onto.
+
+    Extra outputs: `windows` lists comfort windows in seconds whose max
+    Delta_P is written to a _windows.csv sidecar. A `spectrum` segment length
+    in seconds writes the Welch PSD of the resampled channels and tunnel
+    pressures to a _spectrum table and figure. A `distance_step` in metres
+    writes the channels on a uniform grid of the first train's distance to
+    a _distance table. A `store` path loads the case into that SQLite
+    results store, see thermopost.store.
+
+    Running: pandas is only imported to write CSV/Parquet/Feather tables and
+    matplotlib only when `plot` is set; with a `plot_path` the figure is
+    saved once per entry of `plot_formats`. Given a pipeline.OutputPipeline,
+    the tables and figure are written in its background processes. With
+    `profile`, per-stage timings are written to a _profile.json sidecar and
+    returned. A stage whose peak RSS exceeds `memory_budget` bytes raises
+    MemoryError, see profiling.StageProfiler.
+    """
+    schema = resolve_schema(input_path, mode)
+    columns = list(schema.columns)
+    distance_columns = [train.distance for train in schema.trains]
+    # Resample the default channels, or every channel
+    channels = columns[1:] if all_channels else list(schema.resampled)
+    # The spectrum also covers the tunnel pressures that are not resampled
+    spectrum_extra = [name for name in schema.tunnel_pressures if name not in channels] if spectrum else []
+    profiler = StageProfiler(memory_budget)
+    time_step = grid.compute_step
+
+    def run(lane, function, *args):
+        if pipeline is None:
+            function(*args)
+        else:
+            pipeline.submit(lane, input_path, function, *args)
+
+    # Parse the data rows between the 9-line header and the Max.value footer,
+    # or reuse them from the cache when the file contents are unchanged
+    grid_bounds, distance_start = None, 0.0
+    with profiler.stage('parse') as record:
+        if t_start is not None or t_end is not None:
+            from thermopost.rowindex import read_time_window
+            # The distance run before the window comes from the rowindex sidecar
+            data, distance_start = read_time_window(input_path, len(columns), t_start, t_end,
+                                                    speed_columns=schema.indices(train.speed for train in schema.trains))
+            if not len(data):
+                raise ValueError(f"{input_path}: no rows between {t_start} s and {t_end} s")
+            digest, raw_cached = None, False
+            time, data_columns = data[:, 0], columns
+            # Only the grid points between the first and last row of the window
+            grid_bounds = (time[0] if t_start is not None else -np.inf, time[-1] if t_end is not None else np.inf)
+        elif compact:
+            time, data_columns, data = parse_compact(input_path, schema, channels + spectrum_extra)
+            digest, raw_cached = None, False
+        else:
+            data, digest, raw_cached = parse_case(input_path, schema, cache_dir, cache_size)
+            time, data_columns = data[:, 0], columns
+        record.update(rows=data.shape[0], columns=len(data_columns), cached=raw_cached)
+
+    # Save the raw table with a Distance(m) column per train, unless a cached
+    # parse already wrote it for this input
+    with profiler.stage('write_raw') as record:
+        raw_paths = table_paths(output_csv_path, output_formats)
+        if raw_cached and is_up_to_date(raw_paths, input_path):
+            print(f"Data in {', '.join(raw_paths)} is up to date")
+        else:
+            raw_distance = train_distances(schema, time, data, data_columns, distance_start)
+            if compact:
+                # Columns of mixed dtypes, written without widening the block
+                raw_columns = ['Time(s)'] + data_columns + distance_columns
+                raw_table = [time, *data.T, *raw_distance.T]
+            else:
+                raw_columns = columns + distance_columns
+                raw_table = np.hstack([data, raw_distance])
+            run('write', _save_table, "Data", raw_columns, raw_table, output_csv_path, output_formats)
+            record.update(rows=len(time), columns=len(raw_columns), queued=pipeline is not None)
+            del raw_table
+
+    # Interpolate pressure data to a uniform time grid
+    with profiler.stage('interpolate') as record:
+        uniform_time, distance, resampled, resampled_cached = resample_case(
+            schema, time, data, data_columns, channels, digest, cache_dir if digest else None, cache_size,
+            grid_bounds, grid, distance_start)
+        if not len(uniform_time):
+            raise ValueError(f"{input_path}: no point of the {time_step:g} s grid between {time[0]:g} s "
+                             f"and {time[-1]:g} s")
+        record.update(rows=resampled.shape[0], columns=resampled.shape[1], cached=resampled_cached)
+
+    # Rolling min/max over the comfort window and Delta = Abs(rolling-max - rolling-min),
+    # computed for all outside coach pressures in one pass
+    with profiler.stage('rolling') as record:
+        rolling_min, rolling_max, delta = delta_p(schema, channels, resampled, window, time_step)
+        rolling = interleave_rolling(rolling_min, rolling_max, delta)
+        record.update(rows=delta.shape[0], columns=delta.shape[1])
+
+    # Max Delta_P for every requested window from one range min/max index
+    if windows:
+        with profiler.stage('windows') as record:
+            from thermopost.comfort import window_maxima, windows_path
+            maxima = window_maxima(schema, channels, resampled, uniform_time, windows, time_step)
+            run('write', _save_windows, maxima, windows_path(interpolated_csv_path))
+            record.update(rows=resampled.shape[0], columns=len(windows) * len(schema.delta_names))
+
+    # Time and channels on a uniform grid of the first train's distance
+    if distance_step:
+        with profiler.stage('distance') as record:
+            from thermopost.distance import distance_path, resample_distance
+            distance_grid, by_distance = resample_distance(
+                train_distances(schema, time, data, data_columns, distance_start)[:, 0],
+                np.column_stack([time, select_columns(data, data_columns, channels)]), distance_step)
+            run('write', _save_table, "Distance data", [schema.trains[0].distance, 'Time(s)'] + channels,
+                np.column_stack([distance_grid, by_distance]), distance_path(interpolated_csv_path), output_formats)
+            record.update(rows=len(distance_grid), columns=by_distance.shape[1] + 1, queued=pipeline is not None)
+
+    # Welch PSD of every resampled channel, all channels in each batched rfft
+    if spectrum:
+        with profiler.stage('spectrum') as record:
+            from thermopost.spectrum import segment_rows, spectrum_columns, spectrum_path, welch
+            values = resampled
+            if spectrum_extra:
+                values = np.column_stack([resampled, resample_columns(
+                    uniform_time, time, select_columns(data, data_columns, spectrum_extra), grid)])
+            frequencies, psd = welch(values, segment_rows(spectrum, time_step), time_step)
+            run('write', _save_table, "Spectrum", spectrum_columns(channels + spectrum_extra),
+                np.column_stack([frequencies, psd]), spectrum_path(interpolated_csv_path), output_formats)
+            record.update(rows=values.shape[0], columns=values.shape[1], queued=pipeline is not None)
+
+    # Save interpolated data in the requested formats
+    with profiler.stage('write_interpolated') as record:
+        table_columns = interpolated_columns(schema, channels)
+        interpolated_table = np.column_stack([uniform_time, distance, resampled, rolling])
+        if grid.adaptive is not None:
+            # Time and distances are smooth, only the channels and rolling columns pick rows
+            interpolated_table = interpolated_table[
+                adaptive_rows(interpolated_table[:, 1 + len(distance_columns):], ADAPTIVE_REFINE, grid.adaptive)]
+        run('write', _save_table, "Interpolated data", table_columns, interpolated_table,
+            interpolated_csv_path, output_formats)
+        record.update(rows=interpolated_table.shape[0], columns=interpolated_table.shape[1],
+                      queued=pipeline is not None)
+
+    # Load the _interpolated table and the summary records into the results store
+    if store:
+        with profiler.stage('store') as record:
+            from thermopost.comfort import outside_index
+            from thermopost.store import store_case
+            from thermopost.summary import case_name, case_records
+            records = case_records(case_name(input_path), schema, data_columns, data, uniform_time, distance,
+                                   outside_index(schema, channels, resampled),
+                                   tuple(dict.fromkeys((window,) + tuple(windows))), time_step=time_step)
+            run('write', store_case, store, input_path, schema, window, table_columns, interpolated_table, records)
+            record.update(rows=interpolated_table.shape[0], columns=interpolated_table.shape[1],
+                          queued=pipeline is not None)
+
+    if plot:
+        with profiler.stage('plot') as record:
+            from thermopost.plot import plot_results
+            run('plot', plot_results, schema, dict(zip(table_columns, interpolated_table.T)), window,
+                plot_path and table_paths(plot_path, plot_formats))
+            if spectrum:
+                from thermopost.plot import plot_spectrum
+                run('plot', plot_spectrum, frequencies, psd, channels + spectrum_extra,
+                    plot_path and table_paths(spectrum_path(plot_path), plot_formats))
+            record.update(rows=interpolated_table.shape[0], columns=interpolated_table.shape[1],
+                          queued=pipeline is not None)
+
+    peak = profiler.peak_rss()
+    if compact and peak:
+        print(f"Peak memory {peak / 1024 ** 2:.0f} MB")
+
+    if not profile:
+        return None
+    report = profiler.report(input=input_path, mode=schema.mode)
+    path = profile_path(interpolated_csv_path)
+    write_json(report, path)
+    print(f"Profile saved to {path}")
+    return report
+
+
+def plot_file(input_path, output_csv_path, interpolated_csv_path, mode=None, window=4.0,
+              output_formats=('csv',), plot_path=None, plot_formats=('png',), **options):
+    """Plot a case from the _interpolated table an earlier run wrote.
+
+    The table is read in the first of `output_formats`. Pass the same
+    `window` as that run, it is only used for the axis labels. Other
+    process_file options are accepted and ignored.
+    """
+    schema = resolve_schema(input_path, mode)
+    interpolated_path = table_paths(interpolated_csv_path, output_formats)[0]
+    interpolated_data = read_table(interpolated_path)
+    print(f"Interpolated data loaded from {interpolated_path}")
+
+    from thermopost.plot import plot_results
+    plot_results(schema, interpolated_data, window, plot_path and table_paths(plot_path, plot_formats))
@@ -0,0 +1,232 @@
+"""Post-process a ThermoTun file while the simulation is still writing it."""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from thermopost.distance import cumulative_distance
+from thermopost.engine import TIME_START, TIME_STEP, interleave_rolling, interpolated_columns, window_rows
+from thermopost.output import table_paths, write_table
+from thermopost.reader import CHUNK_BYTES, FOOTER_MARKER, HEADER_LINES, parse_rows
+from thermopost.resample import interp_columns
+from thermopost.rolling import rolling_delta
+from thermopost.schema import SCHEMAS, schema_for_row
+
+
+class _Rows:
+    # Row block that grows by doubling, so appending costs the new rows only
+    def __init__(self, n_columns, capacity=1024):
+        self.values = np.empty((capacity, n_columns))
+        self.size = 0
+
+    def set(self, start, rows):
+        stop = start + len(rows)
+        if stop > len(self.values):
+            values = np.empty((max(stop, 2 * len(self.values)), self.values.shape[1]))
+            values[:self.size] = self.values[:self.size]
+            self.values = values
+        self.values[start:stop] = rows
+        self.size = max(self.size, stop)
+
+    def append(self, rows):
+        self.set(self.size, rows)
+
+    def view(self):
+        return self.values[:self.size]
+
+
+class CaseFollower:
+    """Incremental parse, resample and rolling Delta_P of a growing ThermoTun file.
+
+    Each poll() parses only the complete lines appended since the last one,
+    resamples the uniform grid points they cover and updates the rolling
+    min/max of the last window, so its cost depends on the new rows only.
+    Once the Max.value footer is read, finish() resamples the end of the
+    grid the same way process_file does.
+    """
+
+    def __init__(self, input_path, mode=None, window=4.0, all_channels=False,
+                 header_lines=HEADER_LINES, read_bytes=CHUNK_BYTES):
+        self.input_path = input_path
+        # Mode 2 takes its number of trains from the first row
+        self.mode = mode
+        self.schema = SCHEMAS[mode] if mode and mode != 2 else None
+        self.window_size = window_rows(window)
+        self.all_channels = all_channels
+        self.header_lines = header_lines
+        self.read_bytes = read_bytes
+        self.offset = None
+        self.finished = False
+        if self.schema:
+            self._start()
+
+    def _start(self):
+        schema = self.schema
+        columns = list(schema.columns)
+        self.channels = columns[1:] if self.all_channels else list(schema.resampled)
+        self.channel_indices = schema.indices(self.channels)
+        self.speed_indices = schema.indices(train.speed for train in schema.trains)
+        self.outside_indices = [self.channels.index(name) for name in schema.outside_pressures]
+        self.raw = _Rows(len(columns))
+        self.resampled = _Rows(len(self.channels))
+        self.rolling = _Rows(3 * len(self.outside_indices))
+
+    def _skip_header(self, file):
+        start = 0
+        for _ in range(self.header_lines):
+            line = file.readline()
+            if not line.endswith(b"\n"):
+                return None
+            start += len(line)
+        return start
+
+    def poll(self):
+        """Read the lines appended since the last poll, return the number of bytes consumed."""
+        with open(self.input_path, 'rb') as file:
+            if self.offset is None:
+                self.offset = self._skip_header(file)
+                if self.offset is None:
+                    return 0
+            file.seek(self.offset)
+            new = file.read(self.read_bytes)
+
+        footer = new.find(FOOTER_MARKER)
+        if footer >= 0:
+            end = new.rfind(b"\n", 0, footer) + 1
+            self.finished = True
+        else:
+            # Keep a partly written last line for the next poll
+            end = new.rfind(b"\n") + 1
+        chunk = new[:end]
+        self.offset += end
+
+        if self.schema is None:
+            first_row = next((line for line in chunk.splitlines() if line.strip()), None)
+            if first_row is None:
+                return end
+            schema = schema_for_row(first_row, self.input_path)
+            if self.mode and schema.mode != self.mode:
+                raise ValueError(f"{self.input_path}: has the columns of mode {schema.mode}, not mode {self.mode}")
+            self.schema = schema
+            self._start()
+        self._extend(parse_rows(chunk, len(self.schema.columns)))
+        return end
+
+    def _extend(self, rows):
+        if not len(rows):
+            return
+        previous = self.raw.size
+        self.raw.append(rows)
+
+        # Grid points strictly before the last row are final: a later row can
+        # not change the rows bracketing them
+        time_end = rows[-1, 0]
+        n_grid = max(int(np.ceil((time_end - TIME_START) / TIME_STEP)), 0)
+        while n_grid > 0 and TIME_START + (n_grid - 1) * TIME_STEP >= time_end:
+            n_grid -= 1
+        while TIME_START + n_grid * TIME_STEP < time_end:
+            n_grid += 1
+        self._resample(n_grid, max(previous - 1, 0))
+
+    def _resample(self, n_grid, first_row):
+        start = self.resampled.size
+        if n_grid <= start:
+            return
+        # The previous last row and the new rows bracket every new grid point
+        uniform_time = TIME_START + np.arange(start, n_grid) * TIME_STEP
+        rows = self.raw.view()[first_row:]
+        self.resampled.append(interp_columns(uniform_time, rows[:, 0], rows[:, self.channel_indices]))
+        self._update_rolling(start)
+
+    def _update_rolling(self, start):
+        window = self.window_size
+        n = self.resampled.size
+        if start <= window:
+            # The back-filled first window may still change, redo the (short) head
+            first, lo = 0, 0
+        else:
+            first, lo = start, start - window + 1
+        outside = self.resampled.values[lo:n][:, self.outside_indices]
+        rolling_min, rolling_max, delta = (values[first - lo:] for values in rolling_delta(outside, window))
+        self.rolling.set(first, interleave_rolling(rolling_min, rolling_max, delta))
+
+    def finish(self):
+        """Resample the end of the grid, up to one step past the last row as process_file does."""
+        if self.schema is None or not self.raw.size:
+            return
+        time_end = self.raw.view()[:, 0].max()
+        n_grid = len(np.arange(TIME_START, time_end + TIME_STEP, TIME_STEP))
+        self._resample(n_grid, max(self.raw.size - 2, 0))
+
+    def raw_table(self):
+        """Columns and rows of the _raw table read so far."""
+        data = self.raw.view()
+        columns = list(self.schema.columns) + [train.distance for train in self.schema.trains]
+        return columns, np.hstack([data, cumulative_distance(data[:, 0], data[:, self.speed_indices])])
+
+    def interpolated_table(self):
+        """Columns and rows of the _interpolated table resampled so far."""
+        n = self.resampled.size
+        uniform_time = TIME_START + np.arange(n) * TIME_STEP
+        data = self.raw.view()
+        distance = interp_columns(uniform_time, data[:, 0], cumulative_distance(data[:, 0], data[:, self.speed_indices]))
+        columns = interpolated_columns(self.schema, self.channels)
+        return columns, np.column_stack([uniform_time, distance, self.resampled.view(), self.rolling.view()])
+
+
+def _write(follower, output_csv_path, interpolated_csv_path, window, output_formats, plot, plot_path, final):
+    if final:
+        columns, values = follower.raw_table()
+        for path in write_table(columns, values, output_csv_path, output_formats):
+            print(f"Data saved to {path}")
+    columns, values = follower.interpolated_table()
+    for path in write_table(columns, values, interpolated_csv_path, output_formats):
+        print(f"Interpolated data saved to {path}")
+    if plot and len(values):
+        from thermopost.plot import plot_results
+        plot_results(follower.schema, dict(zip(columns, values.T)), window, plot_path)
+
+
+def follow_file(input_path, output_csv_path, interpolated_csv_path, mode=None, window=4.0,
+                all_channels=False, output_formats=('csv',), plot=True, plot_path=None,
+                interval=10.0, poll_interval=1.0, plot_formats=('png',), **options):
+    """Post-process `input_path` while it grows, until its footer is written or Ctrl+C.
+
+    The _interpolated table and the plot (saved to `plot_path` in each of
+    `plot_formats`) are refreshed every `interval` seconds while rows keep
+    coming; the _raw table is written once at the end. The final outputs
+    match those of process_file. Cache and profile options are accepted and
+    ignored.
+    """
+    if plot and 'matplotlib' not in sys.modules:
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+    if plot_path:
+        plot_path = table_paths(plot_path, plot_formats)
+    follower = CaseFollower(input_path, mode, window, all_channels)
+    print(f"Following {input_path}, press Ctrl+C to stop")
+    last_refresh = time.monotonic()
+    refreshed_rows = 0
+    try:
+        while not follower.finished:
+            consumed = follower.poll()
+            if follower.finished:
+                break
+            if (follower.schema and follower.raw.size > refreshed_rows
+                    and time.monotonic() - last_refresh >= interval):
+                _write(follower, output_csv_path, interpolated_csv_path, window,
+                       output_formats, plot, plot_path, final=False)
+                last_refresh = time.monotonic()
+                refreshed_rows = follower.raw.size
+            if consumed < follower.read_bytes:
+                # Caught up with the writer
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print(f"Stopped following {input_path}")
+
+    if follower.schema is None or not follower.raw.size:
+        print(f"No data rows in {input_path}")
+        return
+    follower.finish()
+    _write(follower, output_csv_path, interpolated_csv_path, window, output_formats, plot, plot_path, final=True)
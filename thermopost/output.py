@@ -0,0 +1,76 @@
+"""Writers and readers for the _raw and _interpolated tables."""
+
+import os
+
+import numpy as np
+
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather', 'npz')
+PLOT_FORMATS = ('png', 'svg', 'pdf')
+
+
+def table_paths(csv_path, output_formats):
+    # Same base name as the CSV output, one extension per format
+    base, _ = os.path.splitext(csv_path)
+    return [f"{base}.{output_format}" for output_format in output_formats]
+
+
+def is_up_to_date(paths, input_path):
+    input_mtime = os.path.getmtime(input_path)
+    return all(os.path.exists(path) and os.path.getmtime(path) >= input_mtime for path in paths)
+
+
+def write_table(columns, values, csv_path, output_formats=('csv',)):
+    """Write a float table in every requested format next to `csv_path`.
+
+    `values` is an (n_rows, n_columns) block or a list of column arrays,
+    which may differ in dtype and are written without being stacked.
+    Returns the written paths. pandas is only imported for CSV, Parquet and
+    Feather (the latter two need pyarrow). The .npz file holds a block as
+    'values', or each column as 'column_<i>', and the column names as
+    'columns'.
+    """
+    paths = table_paths(csv_path, output_formats)
+    df = None
+    for output_format, path in zip(output_formats, paths):
+        if output_format == 'npz':
+            if isinstance(values, list):
+                arrays = {f'column_{i}': column for i, column in enumerate(values)}
+            else:
+                arrays = {'values': values}
+            np.savez_compressed(path, columns=np.array(columns, dtype=str), **arrays)
+            continue
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+        if df is None:
+            import pandas as pd
+            if isinstance(values, list):
+                df = pd.DataFrame(dict(zip(columns, values)), copy=False)
+            else:
+                df = pd.DataFrame(values, columns=columns, copy=False)
+        if output_format == 'csv':
+            df.to_csv(path, index=False)
+        elif output_format == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_feather(path)
+    return paths
+
+
+def read_table(path):
+    """Load a table written by write_table, the format is taken from the extension."""
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lstrip('.')
+    if extension == 'csv':
+        return pd.read_csv(path)
+    if extension == 'parquet':
+        return pd.read_parquet(path)
+    if extension == 'feather':
+        return pd.read_feather(path)
+    if extension == 'npz':
+        with np.load(path, allow_pickle=False) as data:
+            columns = list(data['columns'])
+            if 'values' in data:
+                return pd.DataFrame(data['values'], columns=columns)
+            return pd.DataFrame({name: data[f'column_{i}'] for i, name in enumerate(columns)})
+    raise ValueError(f"Unknown output format {extension!r}, expected one of {OUTPUT_FORMATS}")
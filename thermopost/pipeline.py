@@ -0,0 +1,94 @@
+"""Background output processes that overlap writing and plotting with the next case."""
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_DEPTH = 2
+LANES = ('write', 'plot')
+
+
+def _timed(function, args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+class OutputPipeline:
+    """Runs output tasks on one worker process per lane, at most `depth` cases behind.
+
+    process_file hands its table writes ('write' lane) and its figure
+    ('plot' lane) to the pipeline and goes on parsing the next case. A
+    lane's slots count cases (task keys), not tasks: the first task of a case
+    waits while `depth` other cases have unfinished tasks on that lane, its
+    further tasks join the slot. So the arrays of at most `depth` cases are
+    held per lane, whatever outputs a case writes. CSV formatting and figure
+    rendering hold the GIL, hence processes rather than threads; the
+    arrays are pickled to them.
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH):
+        from thermopost.batch import _init_worker
+        self.lock = threading.Lock()
+        self.errors = {}
+        self.busy = dict.fromkeys(LANES, 0.0)
+        self.blocked = 0.0
+        self.slots = {lane: threading.BoundedSemaphore(depth) for lane in LANES}
+        # Unfinished tasks per (lane, key), a key holds one slot while it has any
+        self.pending = {}
+        self.pools = {lane: ProcessPoolExecutor(max_workers=1, initializer=_init_worker) for lane in LANES}
+
+    def submit(self, lane, key, function, *args):
+        """Queue `function(*args)` on a lane, waiting while the lane is full.
+
+        A failure is recorded under `key` (the input path) in `errors`.
+        """
+        with self.lock:
+            queued = self.pending.get((lane, key), 0)
+            if queued:
+                self.pending[lane, key] = queued + 1
+        if not queued:
+            start = time.perf_counter()
+            self.slots[lane].acquire()
+            with self.lock:
+                self.blocked += time.perf_counter() - start
+                self.pending[lane, key] = 1
+        try:
+            future = self.pools[lane].submit(_timed, function, args)
+        except BaseException:
+            self._release(lane, key)
+            raise
+        future.add_done_callback(lambda future: self._done(lane, key, future))
+
+    def _release(self, lane, key):
+        # One task of `key` is done, free its slot with its last task
+        with self.lock:
+            self.pending[lane, key] -= 1
+            last = not self.pending[lane, key]
+            if last:
+                del self.pending[lane, key]
+        if last:
+            self.slots[lane].release()
+
+    def _done(self, lane, key, future):
+        try:
+            seconds = future.result()
+        except Exception as exc:
+            with self.lock:
+                self.errors.setdefault(key, f"{type(exc).__name__}: {exc}")
+        else:
+            with self.lock:
+                self.busy[lane] += seconds
+        self._release(lane, key)
+
+    def close(self):
+        """Wait for the queued tasks to finish, return the errors by key."""
+        for pool in self.pools.values():
+            pool.shutdown()
+        return self.errors
+
+    def stats(self):
+        """Seconds spent writing and plotting in the background, and blocked on full lanes."""
+        with self.lock:
+            return dict(write_seconds=self.busy['write'], plot_seconds=self.busy['plot'],
+                        blocked_seconds=self.blocked)
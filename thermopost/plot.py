@@ -0,0 +1,140 @@
+"""Figures of processed cases: coach pressures and Delta_P, spectra and comparisons."""
+
+import matplotlib.pyplot as plt
+
+from thermopost.decimate import minmax_decimate
+
+
+def plot_results(schema, interpolated_data, window, plot_path=None):
+    """Draw the 2x2 result figure, saved to `plot_path` or shown in a window.
+
+    `plot_path` may also be a list of paths, one file per format (.png, .svg,
+    .pdf). Long series are min/max decimated, so drawing time does not grow
+    with the run length and no peak is lost.
+    """
+    first_train = schema.trains[0]
+    styles = [('-', 'k'), (':', 'r'), ('-', 'k'), (':', 'r')]
+
+    plt.figure(figsize=(14, 10))
+
+    # Subplot 1: Pressure Front and Rear coach[kPa] vs Time(s)
+    plt.subplot(2, 2, 1)
+    for name, (linestyle, color) in zip(first_train.coach_pressures, styles):
+        plt.plot(*minmax_decimate(interpolated_data['Time(s)'], interpolated_data[name]), linestyle=linestyle, color=color, label=name)
+    plt.xlabel('Time(s)')
+    plt.ylabel('Pressure [kPa]')
+    plt.title('Pressure [kPa] vs Time(s)')
+    plt.legend()
+    plt.grid(True)
+
+    # Subplot 2: Pressure Front and Rear coach[kPa] vs Distance (m)
+    if schema.plot_distance:
+        plt.subplot(2, 2, 2)
+        for name, (linestyle, color) in zip(first_train.coach_pressures, styles):
+            plt.plot(*minmax_decimate(interpolated_data[first_train.distance], interpolated_data[name]), linestyle=linestyle, color=color, label=name)
+        plt.xlabel('Distance (m)')
+        plt.ylabel('Pressure [kPa]')
+        plt.title(f'Pressure [kPa] vs {first_train.distance}')
+        plt.legend()
+        plt.grid(True)
+
+    # Subplot 3: Delta_PFout and Delta_PRout vs Distance(m) of every train
+    plt.subplot(2, 2, 3)
+    for train in schema.trains:
+        front, rear = train.delta_names
+        plt.plot(*minmax_decimate(interpolated_data[train.distance], interpolated_data[f'Delta_{front}']), linestyle='-', color='k', label=f'ΔPout{train.suffix} [kPa] Front')
+        plt.plot(*minmax_decimate(interpolated_data[train.distance], interpolated_data[f'Delta_{rear}']), linestyle='-', color='r', label=f'ΔPout{train.suffix} [kPa] Rear')
+    plt.xlabel('Distance (m)')
+    plt.ylabel(f'ΔPout [kPa] in Δt = {window:g} sec')
+    plt.title(f'ΔPout [kPa] in Δt = {window:g} sec vs {first_train.distance}')
+    # if required plt.axhline(y=3, color='b', linestyle='--', label='Reference Line (0.3)')
+    plt.legend()
+    plt.grid(True)
+
+    # Subplot 4: tunnel probe pressures vs Distance(m)
+    if schema.probe_pressures:
+        plt.subplot(2, 2, 4)
+        for name, color in zip(schema.probe_pressures, ['k', 'r', 'b', 'g']):
+            plt.plot(*minmax_decimate(interpolated_data[first_train.distance], interpolated_data[name]), linestyle='-', color=color, label=name)
+        plt.xlabel('Distance (m)')
+        plt.ylabel('Pressure Middle of Tunnel[kPa]')
+        plt.title('Pressure Middle of Tunnel[kPa] vs Distance(m)')
+        plt.legend()
+        plt.grid(True)
+
+    _finish(plot_path)
+
+
+def plot_spectrum(frequencies, psd, channels, plot_path=None):
+    """Draw the PSD of every channel on log-log axes, like plot_results.
+
+    Coach pressures, other pressures and velocities get one subplot each.
+    """
+    groups = [
+        ('Coach pressure', [i for i, name in enumerate(channels) if 'coach' in name]),
+        ('Tunnel pressure', [i for i, name in enumerate(channels) if 'coach' not in name and 'Pressure' in name]),
+        ('Velocity', [i for i, name in enumerate(channels) if 'Velocity' in name]),
+    ]
+    groups = [(title, indices) for title, indices in groups if indices]
+    units = {'Velocity': '(m/s)²/Hz'}
+
+    plt.figure(figsize=(14, 5 * len(groups)))
+    for n, (title, indices) in enumerate(groups, start=1):
+        plt.subplot(len(groups), 1, n)
+        # Leave out the DC bin, which has no place on a log axis
+        for i in indices:
+            plt.loglog(frequencies[1:], psd[1:, i], label=channels[i])
+        plt.xlabel('Frequency (Hz)')
+        plt.ylabel(f"PSD [{units.get(title, 'kPa²/Hz')}]")
+        plt.title(f'{title} PSD vs Frequency (Hz)')
+        plt.legend(fontsize='small')
+        plt.grid(True, which='both')
+
+    _finish(plot_path)
+
+
+def plot_comparison(schema, names, axis_column, grid, columns, values, train=1, window=4.0, plot_path=None):
+    """Overlay the outside pressures and Delta_P of one train for every case, with their differences.
+
+    `values` is a cases x grid x columns array, the first case the baseline.
+    The left column of subplots overlays the cases, the right one shows each
+    case minus the baseline.
+    """
+    selected = schema.trains[train - 1]
+    shown = list(selected.outside_pressures) + [f'Delta_{name}' for name in selected.delta_names]
+
+    plt.figure(figsize=(14, 4 * len(shown)))
+    for row, column in enumerate(shown):
+        j = columns.index(column)
+        unit = f'ΔPout [kPa] in Δt = {window:g} sec' if column.startswith('Delta_') else 'Pressure [kPa]'
+        plt.subplot(len(shown), 2, 2 * row + 1)
+        for name, case_values in zip(names, values):
+            plt.plot(*minmax_decimate(grid, case_values[:, j]), label=name)
+        plt.xlabel(axis_column)
+        plt.ylabel(unit)
+        plt.title(column)
+        plt.legend(fontsize='small')
+        plt.grid(True)
+
+        plt.subplot(len(shown), 2, 2 * row + 2)
+        for name, case_values in zip(names[1:], values[1:]):
+            plt.plot(*minmax_decimate(grid, case_values[:, j] - values[0][:, j]), label=f'{name} - {names[0]}')
+        plt.xlabel(axis_column)
+        plt.ylabel(f'Difference {unit}')
+        plt.title(f'{column} difference to {names[0]}')
+        plt.legend(fontsize='small')
+        plt.grid(True)
+
+    _finish(plot_path)
+
+
+def _finish(plot_path):
+    plt.tight_layout()
+    if plot_path:
+        # Headless runs render the figure to files instead of opening a window
+        for path in [plot_path] if isinstance(plot_path, str) else plot_path:
+            plt.savefig(path)
+            print(f"Plot saved to {path}")
+        plt.close()
+    else:
+        plt.show()
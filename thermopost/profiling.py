@@ -0,0 +1,125 @@
+"""Per-stage wall time, CPU time and peak memory of process_file."""
+
+import contextlib
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss():
+    """Peak resident set size in bytes since the last reset_peak_rss, None if unknown.
+
+    Where the peak cannot be reset (macOS, Windows) it is the high-water
+    mark of the whole process life.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kB, macOS bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+
+
+def reset_peak_rss():
+    """Reset the peak RSS to the current RSS (Linux), return whether it was reset."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        return False
+    return True
+
+
+class StageProfiler:
+    """Collects one record per `with profiler.stage(name) as record:` block.
+
+    Callers may add 'rows' and 'columns' to the yielded record. Each
+    record's 'peak_rss_bytes' is the peak RSS during that stage where the
+    peak can be reset (Linux), so a worker's earlier cases do not carry
+    over; elsewhere it is the process high-water mark. A stage whose peak
+    exceeds `memory_budget` bytes raises MemoryError as it ends.
+    """
+
+    def __init__(self, memory_budget=None):
+        self.stages = []
+        self.memory_budget = memory_budget
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        record = {'stage': name, 'rows': None, 'columns': None}
+        reset_peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            record['peak_rss_bytes'] = peak_rss()
+            self.stages.append(record)
+        peak = record['peak_rss_bytes']
+        if self.memory_budget and peak and peak > self.memory_budget:
+            raise MemoryError(f"peak memory {peak / 1024 ** 2:.0f} MB in the {name} stage is over the "
+                              f"{self.memory_budget / 1024 ** 2:.0f} MB budget")
+
+    def peak_rss(self):
+        """Peak RSS over the stages so far, None if unknown."""
+        peaks = [record['peak_rss_bytes'] for record in self.stages if record['peak_rss_bytes'] is not None]
+        return max(peaks, default=None)
+
+    def report(self, **info):
+        return dict(info, stages=self.stages,
+                    wall_seconds=sum(record['wall_seconds'] for record in self.stages),
+                    cpu_seconds=sum(record['cpu_seconds'] for record in self.stages),
+                    peak_rss_bytes=self.peak_rss())
+
+
+def profile_path(interpolated_csv_path):
+    base, _ = os.path.splitext(interpolated_csv_path)
+    return f"{base.removesuffix('_interpolated')}_profile.json"
+
+
+def write_json(report, path):
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def aggregate(reports):
+    """Sum the per-stage records of many files, peak RSS is the maximum."""
+    stages = {}
+    for report in reports:
+        for record in report['stages']:
+            total = stages.setdefault(record['stage'], {
+                'stage': record['stage'], 'files': 0, 'rows': 0,
+                'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_bytes': None,
+            })
+            total['files'] += 1
+            total['rows'] += record['rows'] or 0
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            if record['peak_rss_bytes'] is not None:
+                total['peak_rss_bytes'] = max(total['peak_rss_bytes'] or 0, record['peak_rss_bytes'])
+    for total in stages.values():
+        total['rows_per_second'] = total['rows'] / total['wall_seconds'] if total['wall_seconds'] else None
+    return {
+        'files': len(reports),
+        'stages': list(stages.values()),
+        'wall_seconds': sum(report['wall_seconds'] for report in reports),
+        'cpu_seconds': sum(report['cpu_seconds'] for report in reports),
+    }
@@ -0,0 +1,84 @@
+"""Sparse-table range min/max for O(1) Delta_P over any interval of rows."""
+
+import numpy as np
+
+
+class RangeMinMax:
+    """Range min/max index over the rows of an (n_rows, n_channels) array.
+
+    Level k holds the min and max of every run of 2**k rows and is built from
+    level k - 1 on first use. Any interval is covered by two runs of the
+    longest level that fits in it, so a query costs O(1) per channel.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        self.n_rows, self.n_channels = values.shape
+        self._levels = [(values, values)]
+
+    def _level(self, k):
+        while len(self._levels) <= k:
+            half = 1 << (len(self._levels) - 1)
+            mins, maxs = self._levels[-1]
+            self._levels.append((np.minimum(mins[:-half], mins[half:]), np.maximum(maxs[:-half], maxs[half:])))
+        return self._levels[k]
+
+    def query(self, start, stop):
+        """Min and max over rows [start, stop) per channel.
+
+        `start` and `stop` are row numbers or arrays of them, the results have
+        their shape plus a channel axis.
+        """
+        start, stop = np.broadcast_arrays(np.asarray(start, dtype=np.intp), np.asarray(stop, dtype=np.intp))
+        if np.any(start < 0) or np.any(stop > self.n_rows) or np.any(stop <= start):
+            raise ValueError(f"intervals must be non-empty and within the {self.n_rows} rows")
+        shape = start.shape + (self.n_channels,)
+        start, stop = start.ravel(), stop.ravel()
+
+        dtype = self._levels[0][0].dtype
+        range_min = np.empty((len(start), self.n_channels), dtype)
+        range_max = np.empty((len(start), self.n_channels), dtype)
+        # floor(log2(length)) picks the level of the two covering runs
+        levels = np.frexp(stop - start)[1] - 1
+        for k in np.unique(levels):
+            selected = levels == k
+            mins, maxs = self._level(k)
+            first, second = start[selected], stop[selected] - (1 << k)
+            range_min[selected] = np.minimum(mins[first], mins[second])
+            range_max[selected] = np.maximum(maxs[first], maxs[second])
+        return range_min.reshape(shape), range_max.reshape(shape)
+
+    def delta(self, start, stop):
+        """Delta = |max - min| over rows [start, stop) per channel."""
+        range_min, range_max = self.query(start, stop)
+        return np.abs(range_max - range_min)
+
+    def rolling(self, window):
+        """Rolling min, max and Delta over `window` rows, the same as rolling_delta(values, window)."""
+        window = max(int(window), 1)
+        values = self._levels[0][0]
+        n_rows = self.n_rows
+        rolling_min = np.empty_like(values)
+        rolling_max = np.empty_like(values)
+
+        # Leading partial windows are plain prefix scans (pandas min_periods=1)
+        head = min(window - 1, n_rows)
+        np.minimum.accumulate(values[:head], axis=0, out=rolling_min[:head])
+        np.maximum.accumulate(values[:head], axis=0, out=rolling_max[:head])
+
+        if n_rows >= window:
+            # Window [i - window + 1, i] is the union of the runs starting there
+            # and ending at i
+            k = window.bit_length() - 1
+            span = 1 << k
+            mins, maxs = self._level(k)
+            np.minimum(mins[:n_rows - window + 1], mins[window - span:n_rows - span + 1], out=rolling_min[window - 1:])
+            np.maximum(maxs[:n_rows - window + 1], maxs[window - span:n_rows - span + 1], out=rolling_max[window - 1:])
+
+        # Replace the first window cells with the value of the first full window
+        if n_rows > window:
+            rolling_min[:window - 1] = rolling_min[window - 1]
+            rolling_max[:window - 1] = rolling_max[window - 1]
+        return rolling_min, rolling_max, np.abs(rolling_max - rolling_min)
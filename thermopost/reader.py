@@ -0,0 +1,213 @@
+"""Streaming reader for ThermoTun text output."""
+
+import mmap
+import os
+import warnings
+
+import numpy as np
+
+HEADER_LINES = 9
+FOOTER_MARKER = b"Max.value"
+CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def _data_span(buf, header_lines):
+    # Skip the header lines and stop at the start of the Max.value footer line
+    start = 0
+    for _ in range(header_lines):
+        newline = buf.find(b"\n", start)
+        if newline < 0:
+            return len(buf), len(buf)
+        start = newline + 1
+
+    end = buf.find(FOOTER_MARKER, start)
+    if end < 0:
+        return start, len(buf)
+    return start, max(buf.rfind(b"\n", start, end) + 1, start)
+
+
+def _fromstring(text, dtype):
+    # np.fromstring only warns on unparsable text, turn that into an error
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=dtype, sep=" ")
+        except (ValueError, DeprecationWarning):
+            return None
+
+
+def _parse_lines(chunk, n_columns, dtype):
+    # Slow path for chunks holding blank, short, long or non-numeric rows. Those
+    # rows are dropped, the same as pd.to_numeric(errors='coerce') followed by
+    # dropna, except a row with too many values, which the DataFrame of the
+    # original scripts refused too.
+    rows = np.empty((chunk.count(b"\n") + 1, n_columns), dtype)
+    n_rows = 0
+    for line in chunk.splitlines():
+        values = _fromstring(line, dtype)
+        if values is not None and values.size == n_columns:
+            rows[n_rows] = values
+            n_rows += 1
+        elif len(line.split()) > n_columns:
+            raise ValueError(f"a data row has {len(line.split())} values, expected {n_columns}: "
+                             f"{bytes(line[:80]).decode(errors='replace')!r}")
+    return rows[:n_rows]
+
+
+def _values_per_line(chunk, n_lines):
+    # Number of whitespace-separated values on each of the n_lines lines of chunk
+    text = np.frombuffer(chunk, np.uint8)
+    space = text <= 32
+    # Each value starts after the space byte at these positions
+    starts = np.flatnonzero(space[:-1] > space[1:])
+    line_ends = np.flatnonzero(text == ord("\n"))
+    if len(line_ends) < n_lines:
+        line_ends = np.append(line_ends, len(text))
+    counts = np.diff(np.searchsorted(starts, line_ends), prepend=0)
+    if len(text) and not space[0]:
+        counts[0] += 1
+    return counts
+
+
+def _parse_chunk(chunk, n_columns, dtype):
+    n_lines = chunk.count(b"\n") + (0 if chunk.endswith(b"\n") else 1)
+    values = _fromstring(chunk, dtype)
+    # The total alone would let a short and a long row shift every later column
+    if (values is not None and values.size == n_lines * n_columns
+            and (_values_per_line(chunk, n_lines) == n_columns).all()):
+        return values.reshape(n_lines, n_columns)
+    return _parse_lines(chunk, n_columns, dtype)
+
+
+def parse_rows(chunk, n_columns, dtype=np.float64):
+    """Parse complete data lines into an (n_rows, n_columns) array.
+
+    Rows containing NaN or unparsable values are dropped, as in read_thermotun.
+    """
+    if not chunk.strip():
+        return np.empty((0, n_columns), dtype)
+    rows = _parse_chunk(chunk, n_columns, dtype)
+    return rows[~np.isnan(rows).any(axis=1)]
+
+
+def _chunks(buf, start, end, chunk_bytes):
+    # Line-aligned slices of buf[start:end] of about chunk_bytes each
+    pos = start
+    while pos < end:
+        stop = min(pos + chunk_bytes, end)
+        if stop < end:
+            # Cut the chunk after the last complete line
+            newline = buf.rfind(b"\n", pos, stop)
+            if newline < 0:
+                newline = buf.find(b"\n", stop, end)
+            stop = newline + 1 if newline >= 0 else end
+        yield buf[pos:stop]
+        pos = stop
+
+
+def read_thermotun(input_path, n_columns, dtype=np.float64,
+                   header_lines=HEADER_LINES, chunk_bytes=CHUNK_BYTES):
+    """Parse the data rows of a ThermoTun file into an (n_rows, n_columns) array.
+
+    The file is memory-mapped and decoded in line-aligned chunks straight into
+    one preallocated block. Rows containing NaN or unparsable values are dropped.
+    """
+    with open(input_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return np.empty((0, n_columns), dtype)
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return parse_thermotun(buf, n_columns, dtype, header_lines, chunk_bytes)
+
+
+def parse_thermotun(buffer, n_columns, dtype=np.float64,
+                    header_lines=HEADER_LINES, chunk_bytes=CHUNK_BYTES):
+    """Parse the data rows of ThermoTun output held in `buffer` (bytes, mmap).
+
+    Same result as read_thermotun on a file with these contents.
+    """
+    block = None
+    n_rows = 0
+
+    start, end = _data_span(buffer, header_lines)
+    for chunk in _chunks(buffer, start, end, chunk_bytes):
+        rows = _parse_chunk(chunk, n_columns, dtype)
+        if block is None:
+            # Size the block from the rows per byte of the first chunk
+            estimate = int(len(rows) * (end - start) / len(chunk) * 1.05) + 1
+            block = np.empty((max(estimate, len(rows)), n_columns), dtype)
+        elif n_rows + len(rows) > len(block):
+            block.resize((max(2 * len(block), n_rows + len(rows)), n_columns), refcheck=False)
+
+        block[n_rows:n_rows + len(rows)] = rows
+        n_rows += len(rows)
+
+    if block is None:
+        return np.empty((0, n_columns), dtype)
+
+    valid = ~np.isnan(block[:n_rows]).any(axis=1)
+    if not valid.all():
+        kept = block[:n_rows][valid]
+        n_rows = len(kept)
+        block[:n_rows] = kept
+    block.resize((n_rows, n_columns), refcheck=False)
+    return block
+
+
+def _stream_chunks(file, header_lines, chunk_bytes):
+    # Line-aligned chunks read one at a time, so at most one is in memory
+    for _ in range(header_lines):
+        if not file.readline():
+            return
+    tail = b""
+    while True:
+        data = file.read(chunk_bytes)
+        chunk = tail + data
+        footer = chunk.find(FOOTER_MARKER)
+        if footer >= 0:
+            yield chunk[:chunk.rfind(b"\n", 0, footer) + 1]
+            return
+        if not data:
+            yield chunk
+            return
+        # Carry the last partial line over to the next chunk
+        cut = chunk.rfind(b"\n") + 1
+        if cut:
+            yield chunk[:cut]
+        tail = chunk[cut:]
+
+
+def read_compact(input_path, n_columns, usecols, dtype=np.float32,
+                 header_lines=HEADER_LINES, chunk_bytes=CHUNK_BYTES):
+    """Parse the time and only the `usecols` columns of a ThermoTun file.
+
+    Returns the time as a float64 array and the `usecols` columns as an
+    (n_rows, len(usecols)) Fortran-ordered block of `dtype`, so each column is
+    one contiguous array. The file is read chunk by chunk instead of being
+    memory-mapped, only a chunk is ever held as text or float64 and the other
+    columns are dropped with it. Rows containing NaN are dropped, as in
+    read_thermotun.
+    """
+    time = np.empty(0)
+    block = np.empty((0, len(usecols)), dtype, order='F')
+    n_rows = 0
+
+    with open(input_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        for chunk in _stream_chunks(file, header_lines, chunk_bytes):
+            rows = parse_rows(chunk, n_columns)
+            if n_rows + len(rows) > len(time):
+                # Size from the rows per byte of the first chunk, then double
+                estimate = int(len(rows) * size / len(chunk) * 1.05) + 1 if not n_rows else 2 * len(time)
+                grown = max(estimate, n_rows + len(rows))
+                grown_time = np.empty(grown)
+                grown_block = np.empty((grown, len(usecols)), dtype, order='F')
+                grown_time[:n_rows] = time[:n_rows]
+                grown_block[:n_rows] = block[:n_rows]
+                time, block = grown_time, grown_block
+
+            time[n_rows:n_rows + len(rows)] = rows[:, 0]
+            block[n_rows:n_rows + len(rows)] = rows[:, usecols]
+            n_rows += len(rows)
+
+    return time[:n_rows], block[:n_rows]
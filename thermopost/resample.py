@@ -0,0 +1,128 @@
+"""Linear resampling of many channels onto a new time grid at once."""
+
+import numpy as np
+
+# Half length of the anti-aliasing filter in samples of the output grid
+FILTER_HALF_WIDTH = 8
+# Largest ratio of output to input spacing filtered at the input rate
+MAX_DECIMATION = 32
+
+
+def interp_columns(x, xp, fp):
+    """np.interp(x, xp, fp[:, k]) for every column k of `fp` in one pass.
+
+    The bracket search over `xp` is done once and the same indices and
+    offsets are applied to the whole (len(xp), n_channels) block. Results
+    match np.interp bit for bit, including the clamping outside `xp`. Float32
+    blocks are only widened to float64 at the gathered rows.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    xp = np.asarray(xp, dtype=np.float64)
+    fp = np.asarray(fp)
+    squeeze = fp.ndim == 1
+    if squeeze:
+        fp = fp[:, np.newaxis]
+
+    if len(xp) == 0:
+        raise ValueError("xp must not be empty")
+    if len(xp) == 1:
+        out = np.repeat(fp[:1], len(x), axis=0).astype(np.float64, copy=False)
+        return out[:, 0] if squeeze else out
+
+    # Interval indices with xp[j] <= x < xp[j + 1]
+    j = np.searchsorted(xp, x, side='right') - 1
+    np.clip(j, 0, len(xp) - 2, out=j)
+    x_left = xp[j]
+    x_right = xp[j + 1]
+    fp_left = fp[j].astype(np.float64, copy=False)
+    fp_right = fp[j + 1].astype(np.float64, copy=False)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (fp_right - fp_left) / (x_right - x_left)[:, np.newaxis]
+        out = slope * (x - x_left)[:, np.newaxis] + fp_left
+
+        # Same special cases as np.interp: exact hits and non-finite slopes
+        exact = x == x_left
+        out[exact] = fp_left[exact]
+        bad = np.isnan(out)
+        if bad.any():
+            rows, cols = np.nonzero(bad)
+            retry = slope[rows, cols] * (x[rows] - x_right[rows]) + fp_right[rows, cols]
+            flat = np.isnan(retry) & (fp_left[rows, cols] == fp_right[rows, cols])
+            retry[flat] = fp_left[rows, cols][flat]
+            out[rows, cols] = retry
+
+    out[x < xp[0]] = fp[0]
+    out[x >= xp[-1]] = fp[-1]
+    return out[:, 0] if squeeze else out
+
+
+def decimation_factor(xp, step):
+    """Ratio of `step` to the median spacing of `xp`, 1 when `step` is not coarser."""
+    if len(xp) < 2:
+        return 1
+    return int(min(max(round(step / np.median(np.diff(xp))), 1), MAX_DECIMATION))
+
+
+def decimate_columns(x, xp, fp, factor, half_width=FILTER_HALF_WIDTH):
+    """Anti-aliased resampling of every column of `fp` onto the uniform grid `x`.
+
+    The columns are linearly interpolated onto a grid `factor` times finer
+    than `x`, then low-pass filtered with a Hamming-windowed sinc cut off at
+    the Nyquist frequency of `x` (as scipy.signal.decimate's FIR filter),
+    evaluated only at the points of `x`. Each tap is one multiply-add over
+    the whole block, all columns at once. The filter is normalised to unit
+    DC gain and the first and last values are held beyond the ends of `xp`.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if factor <= 1 or len(x) < 2:
+        return interp_columns(x, xp, fp)
+    fine_step = (x[1] - x[0]) / factor
+    half = half_width * factor
+    n = np.arange(-half, half + 1)
+    taps = np.sinc(n / factor) * np.hamming(len(n))
+    taps /= taps.sum()
+
+    # Output point k is at fine[k * factor + half]
+    fine = interp_columns(x[0] + np.arange(-half, (len(x) - 1) * factor + half + 1) * fine_step, xp, fp)
+    squeeze = fine.ndim == 1
+    if squeeze:
+        fine = fine[:, np.newaxis]
+    out = np.zeros((len(x), fine.shape[1]))
+    for i, tap in enumerate(taps):
+        out += tap * fine[i::factor][:len(x)]
+    return out[:, 0] if squeeze else out
+
+
+def adaptive_rows(values, factor, tolerance):
+    """Rows of `values` (on a uniform grid) to keep so peaks and steep gradients survive.
+
+    Every `factor`-th row and the last row are kept. Then each interval
+    between kept rows where some column strays more than `tolerance` from
+    the straight line between its ends also keeps its furthest row
+    (Douglas-Peucker), all intervals at once, until linear interpolation
+    between the kept rows is within `tolerance` of every row. Returns the
+    sorted row indices.
+    """
+    if tolerance < 0:
+        raise ValueError(f"adaptive tolerance must not be negative, got {tolerance:g}")
+    n = len(values)
+    keep = np.zeros(n, dtype=bool)
+    keep[::factor] = True
+    keep[-1:] = True
+    rows = np.arange(n)
+    while True:
+        kept = np.flatnonzero(keep)
+        if len(kept) < 2:
+            return kept
+        k = np.clip(np.searchsorted(kept, rows, side='right') - 1, 0, len(kept) - 2)
+        left, right = kept[k], kept[k + 1]
+        weight = ((rows - left) / (right - left))[:, np.newaxis]
+        error = np.abs(values - (values[left] + weight * (values[right] - values[left]))).max(axis=1)
+        error[keep] = 0.0
+        # The furthest row of every interval that is out of tolerance
+        worst = np.maximum.reduceat(error, kept[:-1])[k]
+        add = (error > tolerance) & (error == worst) & ~keep
+        if not add.any():
+            return kept
+        keep |= add
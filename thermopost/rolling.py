@@ -0,0 +1,51 @@
+"""Rolling min/max and Delta_P over a trailing window for many channels at once."""
+
+import numpy as np
+
+
+def _block_scans(values, window, ufunc):
+    # van Herk/Gil-Werman: prefix and suffix scans inside blocks of `window` rows
+    n_rows, n_channels = values.shape
+    n_blocks = -(-n_rows // window)
+    padded = np.empty((n_blocks * window, n_channels), values.dtype)
+    padded[:n_rows] = values
+    padded[n_rows:] = values[-1]
+    blocks = padded.reshape(n_blocks, window, n_channels)
+
+    prefix = ufunc.accumulate(blocks, axis=1).reshape(-1, n_channels)[:n_rows]
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_channels)[:n_rows]
+    return prefix, suffix
+
+
+def _rolling(values, window, ufunc):
+    prefix, suffix = _block_scans(values, window, ufunc)
+    result = np.empty_like(values)
+    # Full windows [i - window + 1, i] straddle at most two blocks
+    if len(values) >= window:
+        result[window - 1:] = ufunc(suffix[:len(values) - window + 1], prefix[window - 1:])
+    # Leading partial windows are plain prefix scans (pandas min_periods=1)
+    result[:window - 1] = prefix[:window - 1]
+
+    # Replace the first window cells with the value of the first full window
+    if len(values) > window:
+        result[:window - 1] = result[window - 1]
+    return result
+
+
+def rolling_delta(values, window):
+    """Return rolling min, max and Delta = |max - min| for each column of `values`.
+
+    `values` is an (n_rows, n_channels) array and `window` a number of rows.
+    Matches pandas .rolling(window, min_periods=1) with the first window cells
+    back-filled from the first full window. Cost does not depend on `window`.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    window = max(int(window), 1)
+    if len(values) == 0:
+        return values.copy(), values.copy(), values.copy()
+
+    rolling_min = _rolling(values, window, np.minimum)
+    rolling_max = _rolling(values, window, np.maximum)
+    return rolling_min, rolling_max, np.abs(rolling_max - rolling_min)
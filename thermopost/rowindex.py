@@ -0,0 +1,141 @@
+"""Sidecar index of line byte offsets and times, to parse only a time window of a file.
+
+The sidecar also keeps the distance each train has run at the indexed
+lines once a window needed it, so a window starts at the right distance.
+"""
+
+import mmap
+import os
+
+import numpy as np
+
+from thermopost.distance import cumulative_distance
+from thermopost.reader import CHUNK_BYTES, HEADER_LINES, _chunks, _data_span, parse_rows, read_thermotun
+
+INDEX_EVERY = 1024
+
+
+def index_path(input_path):
+    base, _ = os.path.splitext(input_path)
+    return f"{base}_rowindex.npz"
+
+
+def _first_value(chunk, start):
+    # Time of the line starting at chunk[start], NaN for blank or bad lines
+    stop = chunk.find(b"\n", start)
+    try:
+        return float(chunk[start:stop if stop >= 0 else len(chunk)].split(None, 1)[0])
+    except (IndexError, ValueError):
+        return np.nan
+
+
+def build_row_index(input_path, every=INDEX_EVERY, header_lines=HEADER_LINES, chunk_bytes=CHUNK_BYTES):
+    """Byte offset and time of every `every`-th data line, plus the end of the data.
+
+    The times are made non-decreasing (bad lines take the time before them)
+    and the end has time inf, so any time window maps to a byte range.
+    """
+    offsets, times = [], []
+    with open(input_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return np.zeros(1, np.int64), np.full(1, np.inf)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            start, end = _data_span(buf, header_lines)
+            pos, n_lines = start, 0
+            for chunk in _chunks(buf, start, end, chunk_bytes):
+                newlines = np.flatnonzero(np.frombuffer(chunk, np.uint8) == ord("\n"))
+                line_starts = np.concatenate([[0], newlines[newlines < len(chunk) - 1] + 1])
+                for line_start in line_starts[(-n_lines) % every::every]:
+                    offsets.append(pos + int(line_start))
+                    times.append(_first_value(chunk, line_start))
+                pos += len(chunk)
+                n_lines += len(line_starts)
+
+    times = np.fmax.accumulate(np.array(times + [np.inf]))
+    times[np.isnan(times)] = -np.inf
+    return np.array(offsets + [end], np.int64), times
+
+
+def load_row_index(input_path, header_lines=HEADER_LINES):
+    """The row index of a file from its sidecar, built and saved when missing or stale."""
+    path = index_path(input_path)
+    stat = os.stat(input_path)
+    try:
+        with np.load(path) as index:
+            if index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+                return index['offsets'], index['times']
+    except (OSError, KeyError, ValueError):
+        pass
+
+    offsets, times = build_row_index(input_path, header_lines=header_lines)
+    try:
+        np.savez(path, offsets=offsets, times=times, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    except OSError:
+        pass  # A read-only directory only costs the rebuild next time
+    return offsets, times
+
+
+def load_index_distances(input_path, n_columns, speed_columns, header_lines=HEADER_LINES):
+    """Distance run by each of the `speed_columns` at the indexed lines (entries x columns).
+
+    Integrated over the whole file the first time, which parses it once as
+    a full run does, then kept in the sidecar.
+    """
+    offsets, times = load_row_index(input_path, header_lines)
+    path = index_path(input_path)
+    speed_columns = np.asarray(speed_columns, dtype=np.int64)
+    try:
+        with np.load(path) as index:
+            saved = dict(index)
+    except (OSError, ValueError):
+        saved = {}
+    if ('distances' in saved and np.array_equal(saved['speed_columns'], speed_columns)
+            and np.array_equal(saved['times'], times)):
+        return saved['distances']
+
+    data = read_thermotun(input_path, n_columns, header_lines=header_lines)
+    distance = cumulative_distance(data[:, 0], data[:, speed_columns])
+    # The distance at each indexed time, the ends held past the data
+    distances = np.column_stack([np.interp(times, data[:, 0], column) for column in distance.T])
+    if 'size' in saved:
+        try:
+            np.savez(path, **dict(saved, distances=distances, speed_columns=speed_columns))
+        except OSError:
+            pass
+    return distances
+
+
+def read_time_window(input_path, n_columns, t_start=None, t_end=None, dtype=np.float64,
+                     header_lines=HEADER_LINES, speed_columns=None):
+    """Parse only the rows with t_start <= time <= t_end, either bound may be None.
+
+    The row index gives the byte range holding the window, which is parsed
+    from the memory-mapped file. Times must increase down the file, as
+    ThermoTun writes them. Rows containing NaN are dropped, as in
+    read_thermotun. With `speed_columns`, also returns the distance each
+    of them has run at the first row of the window, from the sidecar and the
+    rows between the indexed line and the window.
+    """
+    offsets, times = load_row_index(input_path, header_lines)
+    # Start at the last indexed line before t_start, stop at the first after t_end
+    entry = max(np.searchsorted(times, t_start, side='left') - 1, 0) if t_start is not None else 0
+    first = offsets[entry]
+    stop = offsets[min(np.searchsorted(times, t_end, side='right'), len(offsets) - 1)] if t_end is not None else offsets[-1]
+    if stop <= first:
+        rows = np.empty((0, n_columns), dtype)
+        return rows if speed_columns is None else (rows, np.zeros(len(speed_columns)))
+
+    with open(input_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        rows = np.concatenate([parse_rows(chunk, n_columns, dtype)
+                               for chunk in _chunks(buf, int(first), int(stop), CHUNK_BYTES)])
+    keep = np.ones(len(rows), dtype=bool)
+    if t_start is not None:
+        keep &= rows[:, 0] >= t_start
+    if t_end is not None:
+        keep &= rows[:, 0] <= t_end
+    if speed_columns is None:
+        return rows[keep]
+
+    start = load_index_distances(input_path, n_columns, speed_columns, header_lines)[entry]
+    lead = rows[:np.argmax(keep) + 1]
+    return rows[keep], cumulative_distance(lead[:, 0], lead[:, speed_columns], start)[-1]
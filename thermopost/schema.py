@@ -0,0 +1,205 @@
+"""Column layouts of the ThermoTun output modes."""
+
+from dataclasses import dataclass
+
+from thermopost.reader import HEADER_LINES, FOOTER_MARKER
+
+
+@dataclass(frozen=True)
+class Train:
+    speed: str
+    distance: str
+    # Front outside, front inside, rear outside, rear inside
+    coach_pressures: tuple
+    # Appended to the rolling-min/-max and Delta_ column names
+    suffix: str = ''
+
+    @property
+    def outside_pressures(self):
+        return self.coach_pressures[0], self.coach_pressures[2]
+
+    @property
+    def delta_names(self):
+        return f'PFout{self.suffix}', f'PRout{self.suffix}'
+
+
+@dataclass(frozen=True)
+class Schema:
+    mode: int
+    columns: tuple
+    trains: tuple
+    # Tunnel probe pressures resampled by default and plotted against distance
+    probe_pressures: tuple = ()
+    # Plot the first train's coach pressures against distance
+    plot_distance: bool = True
+
+    @property
+    def resampled(self):
+        # Channels resampled onto the uniform time grid by default
+        coach = tuple(name for train in self.trains for name in train.coach_pressures)
+        return coach + self.probe_pressures
+
+    @property
+    def outside_pressures(self):
+        return tuple(name for train in self.trains for name in train.outside_pressures)
+
+    @property
+    def tunnel_pressures(self):
+        # Every pressure column that is not a coach pressure
+        coach = {name for train in self.trains for name in train.coach_pressures}
+        return tuple(name for name in self.columns if name.startswith('Pressure') and name not in coach)
+
+    @property
+    def delta_names(self):
+        return tuple(name for train in self.trains for name in train.delta_names)
+
+    def indices(self, names):
+        return [self.columns.index(name) for name in names]
+
+
+MODE_1 = Schema(
+    mode=1,
+    columns=(
+        "Time(s)",
+        "Pressure at x=L/4 Tunnel-1(kPa)",
+        "Pressure at x=L/2 Tunnel-1(kPa)",
+        "Pressure at x=3L/4 Tunnel-1(kPa)",
+        "Velocity at x=L/4 Tunnel-1(m/s)",
+        "Velocity at x=L/2 Tunnel-1(m/s)",
+        "Velocity at x=3L/4 Tunnel-1(m/s)",
+        "Pressure Front coach(outside)[kPa]",
+        "Pressure Front coach(inside)[kPa]",
+        "Pressure Rear coach(outside)[kPa]",
+        "Pressure Rear coach(inside)[kPa]",
+        "Speed Train(m/s)",
+    ),
+    trains=(
+        Train(
+            speed="Speed Train(m/s)",
+            distance="Distance(m)",
+            coach_pressures=(
+                "Pressure Front coach(outside)[kPa]",
+                "Pressure Front coach(inside)[kPa]",
+                "Pressure Rear coach(outside)[kPa]",
+                "Pressure Rear coach(inside)[kPa]",
+            ),
+        ),
+    ),
+)
+
+TUNNEL_COLUMNS = (
+    "Time(s)",
+    "Pressure at x=L/4 Tunnel-1(kPa)",
+    "Pressure at x=L/2 Tunnel-1(kPa)",
+    "Pressure at x=3L/4 Tunnel-1(kPa)",
+    "Velocity at x=L/4 Tunnel-1(m/s)",
+    "Velocity at x=L/2 Tunnel-1(m/s)",
+    "Velocity at x=3L/4 Tunnel-1(m/s)",
+)
+
+
+def _numbered_train(n):
+    return Train(
+        speed=f"Speed Train(m/s)-{n}",
+        distance=f"Distance(m)-tr{n}",
+        coach_pressures=(
+            f"Pressure Front coach(outside)[kPa]-tr{n}",
+            f"Pressure Front coach(inside)[kPa]-tr{n}",
+            f"Pressure Rear coach(outside)[kPa]-tr{n}",
+            f"Pressure Rear coach(inside)[kPa]-tr{n}",
+        ),
+        suffix=f"-tr{n}",
+    )
+
+
+def multi_train_schema(n_trains):
+    """Mode 2 layout for `n_trains` trains: the tunnel columns, then per train
+    its four coach pressures and its speed."""
+    trains = tuple(_numbered_train(n) for n in range(1, n_trains + 1))
+    columns = TUNNEL_COLUMNS + tuple(name for train in trains for name in train.coach_pressures + (train.speed,))
+    return Schema(mode=2, columns=columns, trains=trains, plot_distance=False)
+
+
+MODE_2 = multi_train_schema(2)
+
+MODE_3 = Schema(
+    mode=3,
+    columns=(
+        "Time(s)",
+        "Pressure Middle of Tunnel 1[kPa]",
+        "Pressure Middle of Tunnel 2[kPa]",
+        "Pressure First coach (outside)[kPa]",
+        "Pressure First coach (inside)[kPa]",
+        "Pressure Last coach (outside)[kPa]",
+        "Pressure Last coach (inside)[kPa]",
+        "Velocity Middle of Tunnel 1[m/s]",
+        "Velocity Middle of Tunnel 2[m/s]",
+        "Velocity Middle of Shaft[m/s]",
+        "Speed Train(m/s)",
+    ),
+    trains=(
+        Train(
+            speed="Speed Train(m/s)",
+            distance="Distance(m)",
+            coach_pressures=(
+                "Pressure First coach (outside)[kPa]",
+                "Pressure First coach (inside)[kPa]",
+                "Pressure Last coach (outside)[kPa]",
+                "Pressure Last coach (inside)[kPa]",
+            ),
+        ),
+    ),
+    probe_pressures=(
+        "Pressure Middle of Tunnel 1[kPa]",
+        "Pressure Middle of Tunnel 2[kPa]",
+    ),
+)
+
+SCHEMAS = {schema.mode: schema for schema in (MODE_1, MODE_2, MODE_3)}
+
+
+def detect_schema(input_path, header_lines=HEADER_LINES):
+    """Pick the schema of a ThermoTun file from the line after its header.
+
+    The layouts have 12 (mode 1), 11 (mode 3) and 7 + 5 per train (mode 2,
+    two or more trains) columns, so the number of values on the first data
+    row identifies the mode and the number of trains.
+    """
+    with open(input_path, 'rb') as file:
+        return detect_schema_in(file, header_lines, input_path)
+
+
+def detect_schema_in(lines, header_lines=HEADER_LINES, source='input'):
+    """detect_schema for an iterable of byte lines, e.g. an open file or io.BytesIO."""
+    for line_number, line in enumerate(lines):
+        if line_number < header_lines or not line.strip():
+            continue
+        if FOOTER_MARKER in line:
+            break
+        return schema_for_row(line, source)
+    raise ValueError(f"{source}: no data rows to detect the mode from")
+
+
+def schema_for_row(line, source='input'):
+    """Pick the schema whose number of columns matches a data row."""
+    n_columns = len(line.split())
+    for schema in SCHEMAS.values():
+        if len(schema.columns) == n_columns:
+            return schema
+    n_trains, extra = divmod(n_columns - len(TUNNEL_COLUMNS), 5)
+    if n_trains >= 2 and not extra:
+        return multi_train_schema(n_trains)
+    raise ValueError(f"{source}: no mode has {n_columns} columns")
+
+
+def resolve_schema(input_path, mode=None):
+    """The schema for `mode`, detected from the file when not given.
+
+    Mode 2 files are always read to find their number of trains.
+    """
+    if mode is None or mode == 2:
+        schema = detect_schema(input_path)
+        if mode and schema.mode != mode:
+            raise ValueError(f"{input_path}: has the columns of mode {schema.mode}, not mode {mode}")
+        return schema
+    return SCHEMAS[mode]
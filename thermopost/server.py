@@ -0,0 +1,271 @@
+"""Long-running post-processing service on a localhost HTTP port.
+
+Jobs run on a pool of worker processes that import numpy, pandas and
+matplotlib (with its font cache) once at start-up, so a job only pays for
+its own parsing and output. Parsed and resampled arrays are kept in an
+on-disk cache between jobs.
+
+Usage: python -m thermopost.server -j 4 --queue-size 16
+
+    POST /jobs   {"input": "Casexyz1-V01.txt", "stage": "process", "window": 4}
+    GET  /stats  queue depth, job counts and latency percentiles
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from thermopost.batch import _init_worker, _run_one, output_paths
+from thermopost.output import table_paths
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 16
+LATENCY_SAMPLES = 1000
+STAGES = ('process', 'summary', 'plot')
+
+
+def _warm_worker():
+    _init_worker()
+    # Pay for the imports and the font cache once per worker, not per job
+    import pandas  # noqa: F401
+    import matplotlib.font_manager
+    import matplotlib.pyplot  # noqa: F401
+    import thermopost.comfort  # noqa: F401
+    import thermopost.plot  # noqa: F401
+    matplotlib.font_manager.findfont('DejaVu Sans')
+
+
+def run_job(stage, input_path, options):
+    """Run one job in a worker, return the output paths and the comfort summary.
+
+    'process' writes the tables and figure like a batch run and then
+    summarizes the case, which reuses the cached parse and resample. A
+    'process' job with t_start/t_end only writes that time window's
+    outputs, and its summary is null. 'summary' only summarizes and 'plot'
+    redraws the figure. A 'grid'
+    option is the fields of an engine.TimeGrid, e.g. {"step": 0.05}.
+    """
+    from thermopost.engine import TimeGrid, plot_file, process_file
+    from thermopost.summary import summarize_file
+
+    started = time.time()
+    if isinstance(options.get('grid'), dict):
+        options = dict(options, grid=TimeGrid(**options['grid']))
+    output_csv_path, interpolated_csv_path, plot_path = output_paths(
+        input_path, options.get('t_start'), options.get('t_end'), options.get('compact'))
+    formats = options.get('output_formats', ('csv',))
+    outputs = {}
+    summary = None
+    if stage == 'process':
+        record = _run_one(process_file, input_path, options)
+        outputs['raw'] = table_paths(output_csv_path, formats)
+        outputs['interpolated'] = table_paths(interpolated_csv_path, formats)
+        if options.get('plot', True):
+            outputs['plot'] = table_paths(plot_path, options.get('plot_formats', ('png',)))
+        if options.get('windows'):
+            from thermopost.comfort import windows_path
+            outputs['windows'] = windows_path(interpolated_csv_path)
+        windowed = options.get('t_start') is not None or options.get('t_end') is not None
+        if record['error'] is None and not windowed:
+            summary = summarize_file(input_path, **options)
+    elif stage == 'summary':
+        record = _run_one(summarize_file, input_path, options)
+        summary = record['result']
+    else:
+        record = _run_one(plot_file, input_path, options)
+        outputs['plot'] = table_paths(plot_path, options.get('plot_formats', ('png',)))
+
+    return dict(input=input_path, stage=stage, error=record['error'], outputs=outputs if record['error'] is None else {},
+                summary=summary, run_seconds=record['seconds'], started=started)
+
+
+class JobQueue:
+    """Bounded front of a process pool with queue-depth and latency stats.
+
+    At most `workers` jobs run and `queue_size` more wait; further jobs are
+    rejected instead of piling up.
+    """
+
+    def __init__(self, workers, queue_size=DEFAULT_QUEUE_SIZE, cache_dir=None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_dir = cache_dir
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.counts = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.waits = collections.deque(maxlen=LATENCY_SAMPLES)
+        # Start the workers now, so the first job finds them warm
+        for future in [self.pool.submit(_warm_worker) for _ in range(workers)]:
+            future.result()
+
+    def submit(self, stage, input_path, options):
+        """Run a job and wait for its result, None when the queue is full."""
+        with self.lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.counts['rejected'] += 1
+                return None
+            self.pending += 1
+        options = dict(options)
+        if self.cache_dir:
+            options.setdefault('cache_dir', self.cache_dir)
+        submitted = time.time()
+        try:
+            result = self.pool.submit(run_job, stage, input_path, options).result()
+        except Exception as exc:
+            result = dict(input=input_path, stage=stage, error=f"{type(exc).__name__}: {exc}",
+                          outputs={}, summary=None, run_seconds=0.0, started=submitted)
+        finally:
+            with self.lock:
+                self.pending -= 1
+        result['queue_seconds'] = max(result.pop('started') - submitted, 0.0)
+        result['seconds'] = time.time() - submitted
+        with self.lock:
+            self.counts['failed' if result['error'] else 'completed'] += 1
+            self.latencies.append(result['seconds'])
+            self.waits.append(result['queue_seconds'])
+        return result
+
+    def stats(self):
+        with self.lock:
+            running = min(self.pending, self.workers)
+            return dict(workers=self.workers, queue_size=self.queue_size,
+                        running=running, queued=self.pending - running,
+                        completed=self.counts['completed'], failed=self.counts['failed'],
+                        rejected=self.counts['rejected'],
+                        latency_seconds=_percentiles(self.latencies),
+                        queue_seconds=_percentiles(self.waits))
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _percentiles(samples):
+    # Over the last LATENCY_SAMPLES jobs
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def percentile(q):
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    return dict(mean=sum(ordered) / len(ordered), p50=percentile(0.5), p95=percentile(0.95), max=ordered[-1])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    queue = None
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._reply(200, self.queue.stats())
+        else:
+            self._reply(404, dict(error=f"unknown path {self.path}"))
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._reply(404, dict(error=f"unknown path {self.path}"))
+            return
+        try:
+            job = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+            if not isinstance(job, dict):
+                raise ValueError(f"got a JSON {type(job).__name__}")
+            input_path = job.pop('input')
+            if not isinstance(input_path, str):
+                raise ValueError(f"'input' is a JSON {type(input_path).__name__}")
+            stage = job.pop('stage', 'process')
+        except (ValueError, KeyError, AttributeError) as exc:
+            self._reply(400, dict(error=f"expected a JSON object with an 'input' path: {exc}"))
+            return
+        if stage not in STAGES:
+            self._reply(400, dict(error=f"unknown stage {stage!r}, expected one of {STAGES}"))
+            return
+        if not os.path.isfile(input_path):
+            self._reply(400, dict(error=f"no such file: {input_path}"))
+            return
+        if 'plot_path' in job:
+            self._reply(400, dict(error="'plot_path' is set by the server, next to the input file"))
+            return
+        if stage == 'summary' and (job.get('t_start') is not None or job.get('t_end') is not None):
+            self._reply(400, dict(error="'t_start' and 't_end' only apply to the 'process' and 'plot' stages"))
+            return
+        if 'output_formats' in job:
+            job['output_formats'] = tuple(job['output_formats'])
+        for key in ('windows', 'plot_formats'):
+            if key in job:
+                job[key] = tuple(job[key])
+
+        result = self.queue.submit(stage, input_path, job)
+        if result is None:
+            self._reply(503, dict(error="queue full, retry later", **self.queue.stats()))
+        else:
+            self._reply(500 if result['error'] else 200, result)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[{self.log_date_time_string()}] {format % args}\n")
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, queue_size=DEFAULT_QUEUE_SIZE, cache_dir=None):
+    """Serve jobs until interrupted."""
+    queue = JobQueue(workers or os.cpu_count() or 1, queue_size, cache_dir)
+    handler = type('Handler', (_Handler,), {'queue': queue})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving on http://{host}:{port} with {queue.workers} workers, cache in {cache_dir or 'none'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        queue.close()
+
+
+def submit(input_path, url=f'http://{DEFAULT_HOST}:{DEFAULT_PORT}', stage='process', **options):
+    """Send a job to a running server and return its result.
+
+    Failed jobs come back with 'error' set; a full queue raises RuntimeError.
+    """
+    body = json.dumps(dict(options, input=os.path.abspath(input_path), stage=stage)).encode()
+    request = urllib.request.Request(f'{url}/jobs', data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as exc:
+        result = json.load(exc)
+        if exc.code == 500:
+            return result
+        raise RuntimeError(f"{exc.code}: {result['error']}") from None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve post-processing jobs on a localhost HTTP port.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('-j', '--jobs', type=int, help="Number of worker processes (default: all cores)")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help=f"Jobs allowed to wait for a worker before new ones are rejected (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--cache-dir', default=os.environ.get('THERMOPOST_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'thermopost-cache'), help="Cache of parsed and resampled arrays shared by the jobs (default: $THERMOPOST_CACHE_DIR or a temp directory)")
+
+    args = parser.parse_args()
+    serve(args.host, args.port, args.jobs, args.queue_size, args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Welch power spectral density of every resampled channel in batched FFTs."""
+
+import os
+
+import numpy as np
+
+from thermopost.engine import TIME_STEP
+
+# 256 samples of the 0.1 s grid, about 0.04 Hz resolution
+DEFAULT_SEGMENT = 25.6
+# Segments per rfft call, bounds the (segments, channels, samples) block
+SEGMENT_BATCH = 256
+
+
+def segment_rows(segment, time_step=TIME_STEP):
+    # Samples of the uniform grid in a segment of `segment` seconds
+    return max(int(round(segment / time_step)), 2)
+
+
+def welch(values, n_samples, step=TIME_STEP):
+    """Welch PSD of every column of `values` (time x channels) sampled every `step` s.
+
+    Segments of `n_samples` overlap by half, have their mean removed and a
+    periodic Hann window applied, and all channels of a batch of segments go
+    through one rfft. Returns the frequencies in Hz and the one-sided PSD
+    (frequencies x channels) in units^2/Hz, as scipy.signal.welch with its
+    defaults. A run shorter than a segment is one segment, a run of fewer
+    than 2 samples raises ValueError.
+    """
+    if len(values) < 2:
+        raise ValueError(f"a spectrum needs at least 2 samples, got {len(values)}")
+    n_samples = min(n_samples, len(values))
+    hop = n_samples - n_samples // 2
+    window = np.hanning(n_samples + 1)[:-1]
+    # (segments, channels, samples) view of the overlapping segments
+    segments = np.lib.stride_tricks.sliding_window_view(values, n_samples, axis=0)[::hop]
+
+    power = np.zeros((values.shape[1], n_samples // 2 + 1))
+    for start in range(0, len(segments), SEGMENT_BATCH):
+        batch = segments[start:start + SEGMENT_BATCH]
+        spectra = np.fft.rfft((batch - batch.mean(axis=2, keepdims=True)) * window, axis=2)
+        power += (spectra.real ** 2 + spectra.imag ** 2).sum(axis=0)
+
+    psd = power / (len(segments) * (window ** 2).sum() / step)
+    # One-sided: double all but the DC and (for even lengths) Nyquist bins
+    psd[:, 1:None if n_samples % 2 else -1] *= 2
+    return np.fft.rfftfreq(n_samples, step), psd.T
+
+
+def spectrum_columns(channels):
+    return ['Frequency(Hz)'] + [f'PSD-{name}' for name in channels]
+
+
+def spectrum_path(path):
+    # <case>_spectrum next to the _interpolated table or the figure
+    base, ext = os.path.splitext(path)
+    return f"{base.removesuffix('_interpolated')}_spectrum{ext}"
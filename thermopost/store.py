@@ -0,0 +1,223 @@
+"""Results store: processed cases in one SQLite file, queried without reparsing.
+
+Each case is stored under its name and mode with its summary records
+(indexed on max Delta_P, its distance, the peak pressures and the speed)
+and every column of its _interpolated table in chunks of CHUNK_ROWS rows.
+Each chunk keeps its min and max, so a query only loads the chunks that can
+match.
+
+Usage: python -m thermopost.store results.db --limit 2.5 --coach rear --distance 1200 1800
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from thermopost.schema import SCHEMAS, multi_train_schema
+from thermopost.summary import DEFAULT_LIMIT, SUMMARY_COLUMNS, case_name
+
+CHUNK_ROWS = 1024
+# Little-endian float64, whatever the platform
+CHUNK_DTYPE = '<f8'
+INDEXED_COLUMNS = ('max_delta_p_kPa', 'distance_of_max_m', 'max_outside_kPa', 'min_outside_kPa', 'max_speed_m_s')
+MATCH_COLUMNS = ['case', 'mode', 'train', 'coach', 'max_delta_p_kPa', 'time_of_max_s', 'distance_of_max_m']
+
+
+def _quoted(names):
+    # 'case' is an SQL keyword
+    return ', '.join(f'"{name}"' for name in names)
+
+
+def open_store(path):
+    """Open (and create) a results store, several processes may write to it."""
+    connection = sqlite3.connect(path, timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(f"""
+        CREATE TABLE IF NOT EXISTS cases (
+            "case" TEXT, mode INTEGER, n_trains INTEGER, input TEXT, window_s REAL, rows INTEGER, stored REAL,
+            PRIMARY KEY ("case", mode));
+        CREATE TABLE IF NOT EXISTS summary ({_quoted(SUMMARY_COLUMNS)});
+        CREATE INDEX IF NOT EXISTS summary_case ON summary ("case", mode);
+        CREATE TABLE IF NOT EXISTS chunks (
+            "case" TEXT, mode INTEGER, channel TEXT, chunk INTEGER, min REAL, max REAL, data BLOB,
+            PRIMARY KEY ("case", mode, channel, chunk));
+        CREATE INDEX IF NOT EXISTS chunks_max ON chunks (channel, max);
+    """)
+    for name in INDEXED_COLUMNS:
+        connection.execute(f'CREATE INDEX IF NOT EXISTS summary_{name} ON summary ("{name}")')
+    return connection
+
+
+def store_case(store_path, input_path, schema, window, columns, values, records):
+    """Replace a case in the store with its _interpolated `columns`/`values` and summary records."""
+    case = case_name(input_path)
+    chunks = []
+    for j, channel in enumerate(columns):
+        column = values[:, j].astype(CHUNK_DTYPE)
+        for chunk, start in enumerate(range(0, len(column), CHUNK_ROWS)):
+            part = column[start:start + CHUNK_ROWS]
+            chunks.append((case, schema.mode, channel, chunk, float(part.min()), float(part.max()), part.tobytes()))
+
+    connection = open_store(store_path)
+    try:
+        with connection:
+            for table in ('cases', 'summary', 'chunks'):
+                connection.execute(f'DELETE FROM {table} WHERE "case" = ? AND mode = ?', (case, schema.mode))
+            connection.execute('INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (case, schema.mode, len(schema.trains), input_path, window, len(values), time.time()))
+            connection.executemany(f'INSERT INTO summary VALUES ({", ".join("?" * len(SUMMARY_COLUMNS))})',
+                                   [[record[name] for name in SUMMARY_COLUMNS] for record in records])
+            connection.executemany('INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)', chunks)
+    finally:
+        connection.close()
+    print(f"Case {case} stored in {store_path}")
+
+
+def _read_chunks(connection, case, mode, channel, chunks):
+    rows = connection.execute(
+        f'SELECT data FROM chunks WHERE "case" = ? AND mode = ? AND channel = ? '
+        f'AND chunk IN ({", ".join("?" * len(chunks))}) ORDER BY chunk', (case, mode, channel, *chunks))
+    return np.concatenate([np.frombuffer(data, CHUNK_DTYPE) for data, in rows])
+
+
+def read_curve(connection, case, mode, channel, start=0, stop=None):
+    """Rows `start` to `stop` of one stored channel of a case."""
+    query = 'SELECT data FROM chunks WHERE "case" = ? AND mode = ? AND channel = ? AND chunk >= ?'
+    parameters = [case, mode, channel, start // CHUNK_ROWS]
+    if stop is not None:
+        query += ' AND chunk <= ?'
+        parameters.append((stop - 1) // CHUNK_ROWS)
+    parts = [np.frombuffer(data, CHUNK_DTYPE) for data, in connection.execute(query + ' ORDER BY chunk', parameters)]
+    if not parts:
+        raise KeyError(f"no channel {channel!r} for case {case!r} in mode {mode}")
+    offset = start // CHUNK_ROWS * CHUNK_ROWS
+    return np.concatenate(parts)[start - offset:None if stop is None else stop - offset]
+
+
+def _schema(mode, n_trains):
+    return multi_train_schema(n_trains) if mode == 2 else SCHEMAS[mode]
+
+
+def find_exceedances(connection, limit=DEFAULT_LIMIT, coach='rear', train=None, distance=None, time_range=None,
+                     mode=None, case=None, curves=False):
+    """Return a record per case, train and coach whose Delta_P exceeds `limit` kPa.
+
+    `distance` and `time_range` are (start, end) bounds on the train
+    distance and the time, `case` is a glob pattern on the case names. The
+    records give the max Delta_P within the bounds and where it occurs. With
+    `curves`, each record also holds the 'time', 'distance' and 'delta'
+    arrays of the rows within the bounds.
+    """
+    filters, parameters = [], []
+    if mode is not None:
+        filters.append('mode = ?')
+        parameters.append(mode)
+    if case is not None:
+        filters.append('"case" GLOB ?')
+        parameters.append(case)
+    where = f'WHERE {" AND ".join(filters)}' if filters else ''
+    groups = connection.execute(f'SELECT DISTINCT mode, n_trains FROM cases {where}', parameters).fetchall()
+
+    records = []
+    for group_mode, n_trains in groups:
+        schema = _schema(group_mode, n_trains)
+        for number in [train] if train else range(1, n_trains + 1):
+            if number > n_trains:
+                continue
+            schema_train = schema.trains[number - 1]
+            delta_channel = f"Delta_{schema_train.delta_names[('front', 'rear').index(coach)]}"
+            bounds = [(channel, bound) for channel, bound in ((schema_train.distance, distance), ('Time(s)', time_range))
+                      if bound is not None]
+            records.extend(_exceedances(connection, group_mode, n_trains, number, coach, delta_channel,
+                                        schema_train.distance, bounds, limit, case, curves))
+    records.sort(key=lambda record: (record['case'], record['mode'], record['train']))
+    return records
+
+
+def _exceedances(connection, mode, n_trains, train, coach, delta_channel, distance_channel, bounds, limit,
+                 case, curves):
+    # Chunks whose max Delta_P is over the limit and whose bounded channels
+    # overlap the bounds, found from the chunk min/max alone
+    joins, parameters = [], []
+    for i, (channel, (start, end)) in enumerate(bounds):
+        joins.append(f'JOIN chunks b{i} ON b{i}."case" = d."case" AND b{i}.mode = d.mode AND b{i}.chunk = d.chunk '
+                     f'AND b{i}.channel = ? AND b{i}.max >= ? AND b{i}.min <= ?')
+        parameters += [channel, start, end]
+    query = (f'SELECT d."case", d.chunk FROM chunks d JOIN cases c ON c."case" = d."case" AND c.mode = d.mode '
+             f'{" ".join(joins)} WHERE d.channel = ? AND d.mode = ? AND c.n_trains = ? AND d.max > ?')
+    parameters += [delta_channel, mode, n_trains, limit]
+    if case is not None:
+        query += ' AND d."case" GLOB ?'
+        parameters.append(case)
+    candidates = {}
+    for name, chunk in connection.execute(query, parameters):
+        candidates.setdefault(name, []).append(chunk)
+
+    # Check the candidate rows exactly
+    for name, chunks in sorted(candidates.items()):
+        chunks.sort()
+        delta = _read_chunks(connection, name, mode, delta_channel, chunks)
+        times = _read_chunks(connection, name, mode, 'Time(s)', chunks)
+        distance = _read_chunks(connection, name, mode, distance_channel, chunks)
+        inside = np.ones(len(delta), dtype=bool)
+        for channel, (start, end) in bounds:
+            values = times if channel == 'Time(s)' else distance
+            inside &= (values >= start) & (values <= end)
+        if not (inside & (delta > limit)).any():
+            continue
+        peak = np.flatnonzero(inside)[delta[inside].argmax()]
+        record = {'case': name, 'mode': mode, 'train': train, 'coach': coach,
+                  'max_delta_p_kPa': float(delta[peak]), 'time_of_max_s': float(times[peak]),
+                  'distance_of_max_m': float(distance[peak])}
+        if curves:
+            record.update(time=times[inside], distance=distance[inside], delta=delta[inside])
+        yield record
+
+
+def write_curves(records, path):
+    """Write the curves of find_exceedances(curves=True) records to one long-format CSV."""
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['case', 'mode', 'train', 'coach', 'Time(s)', 'Distance(m)', 'Delta_P(kPa)'])
+        for record in records:
+            key = [record['case'], record['mode'], record['train'], record['coach']]
+            writer.writerows([*key, *row] for row in zip(record['time'].tolist(), record['distance'].tolist(),
+                                                      record['delta'].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the cases of a results store whose ΔPout exceeds a limit.")
+    parser.add_argument('store', help="Results store written with --store")
+    parser.add_argument('--limit', type=float, default=DEFAULT_LIMIT, help=f"ΔPout limit in kPa (default: {DEFAULT_LIMIT:g})")
+    parser.add_argument('--coach', choices=('front', 'rear'), default='rear', help="Coach (default: rear)")
+    parser.add_argument('--train', type=int, help="Train number (default: every train)")
+    parser.add_argument('--distance', type=float, nargs=2, metavar=('START', 'END'), help="Only rows where the train is between these distances in m")
+    parser.add_argument('--time', type=float, nargs=2, metavar=('START', 'END'), help="Only rows between these times in s")
+    parser.add_argument('-m', '--mode', type=int, choices=sorted(SCHEMAS), help="Only cases of this mode")
+    parser.add_argument('--case', metavar='PATTERN', help="Only cases whose name matches this glob pattern")
+    parser.add_argument('--curves', metavar='PATH', help="Write time, distance and ΔPout of the matching rows to this CSV")
+
+    args = parser.parse_args()
+    connection = open_store(args.store)
+    start = time.perf_counter()
+    records = find_exceedances(connection, args.limit, args.coach, args.train, args.distance, args.time,
+                               args.mode, args.case, curves=bool(args.curves))
+    elapsed = time.perf_counter() - start
+    n_cases = connection.execute('SELECT COUNT(*) FROM cases').fetchone()[0]
+    connection.close()
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=MATCH_COLUMNS, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(records)
+    print(f"{len(records)} matches in {n_cases} cases ({elapsed * 1000:.1f} ms)", file=sys.stderr)
+    if args.curves:
+        write_curves(records, args.curves)
+        print(f"Curves saved to {args.curves}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
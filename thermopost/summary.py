@@ -0,0 +1,100 @@
+"""Reduce each case of a parametric sweep to a few comfort metrics."""
+
+import csv
+import os
+
+import numpy as np
+
+from thermopost.cache import DEFAULT_MAX_BYTES
+from thermopost.comfort import outside_index, window_deltas
+from thermopost.engine import (DEFAULT_GRID, TIME_STEP, parse_case, parse_compact, resample_case,
+                               select_columns, train_pressures)
+from thermopost.schema import resolve_schema
+
+DEFAULT_LIMIT = 3.0
+
+SUMMARY_COLUMNS = [
+    'case', 'mode', 'train', 'coach', 'window_s',
+    'max_delta_p_kPa', 'time_of_max_s', 'distance_of_max_m',
+    'max_outside_kPa', 'min_outside_kPa', 'max_inside_kPa', 'min_inside_kPa', 'max_speed_m_s',
+    'limit_kPa', 'exceeds_limit', 'time_above_limit_s',
+]
+
+
+def summarize_file(input_path, output_csv_path=None, interpolated_csv_path=None, mode=None, window=4.0,
+                   limit=DEFAULT_LIMIT, cache_dir=None, cache_size=DEFAULT_MAX_BYTES, windows=(),
+                   compact=False, grid=DEFAULT_GRID, **options):
+    """Return one summary record per train, coach (front, rear) and comfort window of a case.
+
+    Runs the parse, resample and rolling stages without writing tables or
+    plots, so only the records leave the worker. `windows` lists the comfort
+    windows in seconds, `window` alone by default; they share one range
+    min/max index. `compact` parses as process_file(compact=True) does, and
+    `grid` is the TimeGrid to resample onto, as in process_file. The output paths
+    and other process_file options are accepted for run_batch and ignored.
+    """
+    schema = resolve_schema(input_path, mode)
+    channels = list(schema.resampled)
+    if compact:
+        time, data_columns, data = parse_compact(input_path, schema, channels)
+        digest, cache_dir = None, None
+    else:
+        data, digest, _ = parse_case(input_path, schema, cache_dir, cache_size)
+        time, data_columns = data[:, 0], list(schema.columns)
+    uniform_time, distance, resampled, _ = resample_case(schema, time, data, data_columns, channels,
+                                                         digest, cache_dir, cache_size, None, grid)
+    return case_records(case_name(input_path), schema, data_columns, data, uniform_time, distance,
+                        outside_index(schema, channels, resampled), windows or (window,), limit, grid.compute_step)
+
+
+def case_name(input_path):
+    return os.path.splitext(os.path.basename(input_path))[0]
+
+
+def case_records(case, schema, data_columns, data, uniform_time, distance, index, windows, limit=DEFAULT_LIMIT,
+                 time_step=TIME_STEP):
+    """Summary records of a parsed and resampled case, `index` is its outside_index.
+
+    `uniform_time` is spaced `time_step` s.
+    """
+    # Coach pressure peaks from the raw rows, so no peak is lost to resampling
+    coach_pressures = train_pressures(schema, data_columns, data)
+    n_trains = len(schema.trains)
+    coach_max = coach_pressures.max(axis=2).reshape(n_trains, 2, 2)
+    coach_min = coach_pressures.min(axis=2).reshape(n_trains, 2, 2)
+    max_speed = select_columns(data, data_columns, [train.speed for train in schema.trains]).max(axis=0)
+
+    records = []
+    for window_s, delta in window_deltas(index, windows, time_step):
+        peak_rows = delta.argmax(axis=0)
+        max_delta = delta[peak_rows, np.arange(delta.shape[1])]
+        time_above = (delta > limit).sum(axis=0) * time_step
+
+        for i in range(delta.shape[1]):
+            train, coach = divmod(i, 2)
+            records.append({
+                'case': case,
+                'mode': schema.mode,
+                'train': train + 1,
+                'coach': ('front', 'rear')[coach],
+                'window_s': window_s,
+                'max_delta_p_kPa': float(max_delta[i]),
+                'time_of_max_s': float(uniform_time[peak_rows[i]]),
+                'distance_of_max_m': float(distance[peak_rows[i], train]),
+                'max_outside_kPa': float(coach_max[train, coach, 0]),
+                'min_outside_kPa': float(coach_min[train, coach, 0]),
+                'max_inside_kPa': float(coach_max[train, coach, 1]),
+                'min_inside_kPa': float(coach_min[train, coach, 1]),
+                'max_speed_m_s': float(max_speed[train]),
+                'limit_kPa': limit,
+                'exceeds_limit': bool(max_delta[i] > limit),
+                'time_above_limit_s': float(time_above[i]),
+            })
+    return records
+
+
+def write_summary(records, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(records)
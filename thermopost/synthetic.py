@@ -0,0 +1,122 @@
+"""Synthetic ThermoTun output files for benchmarks and demos.
+
+Usage: python -m thermopost.synthetic -m 2 -n 1000000 -o Casexyz2-S01.txt
+"""
+
+import argparse
+import re
+
+import numpy as np
+
+from thermopost.schema import SCHEMAS, multi_train_schema
+
+CHUNK_ROWS = 100_000
+TIME_STEP = 0.005
+TRAIN_SPEED = 55.0
+TUNNEL_LENGTH = 2000.0
+SOUND_SPEED = 340.0
+TUNNEL_CYCLE = 60.0
+
+
+def _pressure_wave(time, delay, amplitude, rise_time, reflections=12):
+    # The train runs through a tunnel every TUNNEL_CYCLE seconds. Inside, the
+    # entry compression wave and its portal reflections are smoothed steps of
+    # alternating sign decaying by 20 %, and everything relaxes after the exit.
+    local_time = np.mod(time, TUNNEL_CYCLE)
+    period = 2 * TUNNEL_LENGTH / SOUND_SPEED
+    wave = np.zeros_like(time)
+    for k in range(reflections):
+        step = 0.5 * (1 + np.tanh((local_time - delay - k * period) / rise_time))
+        wave += (-0.8) ** k * amplitude * step
+    exit_time = delay + TUNNEL_LENGTH / TRAIN_SPEED
+    return wave * 0.5 * (1 - np.tanh((local_time - exit_time) / rise_time))
+
+
+def _channel(name, time, speed, rng):
+    # Shape each column from keywords in its name
+    if name.startswith('Speed'):
+        return speed
+    number = re.search(r'-(?:tr)?(\d+)$', name)
+    train = int(number.group(1)) if number else 1
+    delay = 5.0 + 3.0 * (train - 1)
+    if 'Rear' in name or 'Last' in name:
+        delay += 0.8
+    elif 'L/2' in name or 'Middle of Tunnel 1' in name:
+        delay += TUNNEL_LENGTH / 2 / SOUND_SPEED
+    elif '3L/4' in name or 'Middle of Tunnel 2' in name:
+        delay += 3 * TUNNEL_LENGTH / 4 / SOUND_SPEED
+    elif 'L/4' in name:
+        delay += TUNNEL_LENGTH / 4 / SOUND_SPEED
+
+    if 'inside' in name:
+        # Sealed coach: slower and smaller pressure changes inside
+        values = _pressure_wave(time, delay, 0.8, 2.5)
+    elif name.startswith('Velocity'):
+        values = _pressure_wave(time, delay, 4.0, 0.3) + ('Shaft' in name) * 1.5
+    else:
+        values = _pressure_wave(time, delay, 2.0, 0.3)
+    return values + rng.normal(0.0, 0.01, len(time))
+
+
+def write_case(output_path, mode, n_rows, seed=0, time_step=TIME_STEP, n_trains=None):
+    """Write a ThermoTun-like file with `n_rows` data rows for `mode`.
+
+    The file has the 9-line header, whitespace separated columns in the
+    mode's layout and the Max.value/Min.value footer. Rows are generated
+    and written in chunks, so any row count fits in memory. Time steps are
+    jittered and the trains accelerate slightly, like real runs. Mode 2
+    files have `n_trains` trains, two by default.
+    """
+    schema = multi_train_schema(n_trains) if mode == 2 and n_trains else SCHEMAS[mode]
+    columns = schema.columns
+    column_max = np.full(len(columns), -np.inf)
+    column_min = np.full(len(columns), np.inf)
+    time_end = 0.0
+
+    with open(output_path, 'w') as file:
+        file.write("ThermoTun/Online synthetic output\n")
+        file.write(f"Mode {mode}\n")
+        file.write(f"Rows {n_rows}\n")
+        file.write(f"Seed {seed}\n")
+        file.write(f"Tunnel length {TUNNEL_LENGTH:g} m\n")
+        file.write(f"Train speed {TRAIN_SPEED:g} m/s\n")
+        file.write("\n")
+        file.write("  ".join(columns) + "\n")
+        file.write("\n")
+
+        for chunk_index, start in enumerate(range(0, n_rows, CHUNK_ROWS)):
+            rng = np.random.default_rng((seed, chunk_index))
+            n_chunk = min(CHUNK_ROWS, n_rows - start)
+            steps = time_step * rng.uniform(0.5, 1.5, n_chunk)
+            steps[0] = 0.0 if start == 0 else steps[0]
+            time = time_end + np.cumsum(steps)
+            time_end = time[-1]
+            speed = TRAIN_SPEED + 0.05 * time
+
+            block = np.empty((n_chunk, len(columns)))
+            block[:, 0] = time
+            for i, name in enumerate(columns[1:], start=1):
+                block[:, i] = _channel(name, time, speed, rng)
+            np.maximum(column_max, block.max(axis=0), out=column_max)
+            np.minimum(column_min, block.min(axis=0), out=column_min)
+            np.savetxt(file, block, fmt='%.6E', delimiter='  ')
+
+        file.write("Max.value  " + "  ".join(f"{value:.6E}" for value in column_max[1:]) + "\n")
+        file.write("Min.value  " + "  ".join(f"{value:.6E}" for value in column_min[1:]) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic ThermoTun output file.")
+    parser.add_argument('-m', '--mode', type=int, choices=sorted(SCHEMAS), required=True, help="ThermoTun output mode")
+    parser.add_argument('-n', '--rows', type=int, default=100_000, help="Number of data rows (default: 100000)")
+    parser.add_argument('-t', '--trains', type=int, help="Number of trains for mode 2 (default: 2)")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument('-o', '--output', required=True, help="Output filename")
+
+    args = parser.parse_args()
+    write_case(args.output, args.mode, args.rows, args.seed, n_trains=args.trains)
+    print(f"Synthetic mode {args.mode} case with {args.rows} rows saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()